@@ -0,0 +1,197 @@
+"""
+    Purpose: Solve many puzzles at once -> batch API over a process pool
+"""
+
+import os
+from functools import partial
+
+from bidirectional import bidirectional_search
+from parallel import hda_star
+from puzzle import Puzzle
+from search import (
+    ALGORITHM_HEURISTICS,
+    TIMEOUT,
+    a_star_linear_conflict,
+    a_star_manhattan,
+    a_star_misplaced,
+    a_star_pdb,
+    a_star_walking_distance,
+    ida_star,
+    solve,
+    table_search,
+    uniform_cost_search,
+    weighted_a_star,
+)
+from suboptimal import anytime_a_star, beam_search
+
+# Tasks kept queued per worker, enough to keep every worker busy without holding
+# the whole batch in memory
+TASKS_PER_WORKER = 4
+
+# Algorithms by the name used on the command line and by the solve service
+# "table" only solves boards of up to 9 cells and "walking" boards up to 4x4, both
+# raise ValueError for bigger ones
+ALGORITHMS = {
+    "ucs": uniform_cost_search,
+    "misplaced": a_star_misplaced,
+    "manhattan": a_star_manhattan,
+    "ida": ida_star,
+    "pdb": a_star_pdb,
+    "conflict": a_star_linear_conflict,
+    "walking": a_star_walking_distance,
+    "table": table_search,
+    "bidirectional": bidirectional_search,
+    "mm": partial(bidirectional_search, heuristic="manhattan"),
+    "weighted": weighted_a_star,
+    "anytime": anytime_a_star,
+    "beam": beam_search,
+    "hda": hda_star,
+}
+
+
+def solve_one(initial_state, goal_state, algorithm, timeout=TIMEOUT):
+    """
+        Solve a single puzzle, this is what runs in the worker processes
+        Returns (actions, metrics), actions is None if no solution was found
+        Only the actions are sent back, not the chain of Nodes
+    """
+    puzzle = Puzzle(initial_state, goal_state)
+    result, _, metrics = solve(puzzle, algorithm, timeout)
+    if result is None:
+        return None, metrics
+    return result.get_actions(), metrics
+
+
+def solve_batch(puzzles, algorithm, workers=None, timeout=TIMEOUT, cache=None):
+    """
+        Solve every puzzle with the algorithm across a pool of worker processes
+        Yields (index, actions, metrics) as each puzzle finishes, not in input order
+        index is the puzzle's position in puzzles, timeout applies to each puzzle
+        workers defaults to the number of CPUs, workers=0 solves in this process
+        cache is an optional SolveCache, hits are yielded without searching
+        A solve that raises is yielded with actions None and failure metrics, so
+        one bad puzzle does not lose the rest. An exception in place of a puzzle,
+        e.g. from reading it, is yielded back the same way without solving anything
+    """
+    puzzles = iter(puzzles)
+
+    if workers == 0:
+        for index, puzzle in enumerate(puzzles):
+            if isinstance(puzzle, Exception):
+                yield index, None, failure(puzzle)
+                continue
+            try:
+                if cache is not None:
+                    actions, metrics = cache.solve(puzzle, algorithm, timeout)
+                else:
+                    actions, metrics = solve_one(
+                        puzzle.initial_state, puzzle.goal_state, algorithm, timeout
+                    )
+            except Exception as e:
+                actions, metrics = None, failure(e)
+            yield index, actions, metrics
+        return
+
+    # Only pools need it, and it is slow to import, so single solves never load it
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    limit = (workers or os.cpu_count() or 1) * TASKS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        # Tables on disk are built once here for each board size and goal, so the
+        # workers map the file instead of racing to build and write it
+        prebuild = None
+        if ALGORITHM_HEURISTICS.get(algorithm) == "pdb":
+            prebuild = Puzzle.get_pattern_db
+        elif algorithm is table_search:
+            prebuild = Puzzle.get_distance_table
+        built = set()
+        for index, puzzle in enumerate(puzzles):
+            if isinstance(puzzle, Exception):
+                yield index, None, failure(puzzle)
+                continue
+            if cache is not None:
+                entry = cache.get(puzzle, algorithm)
+                if entry is not None:
+                    actions, metrics = entry
+                    yield index, actions, dict(metrics, cache_hit=True)
+                    continue
+
+            try:
+                goal = (puzzle.rows, puzzle.cols, puzzle.goal_packed)
+                if prebuild is not None and goal not in built:
+                    prebuild(puzzle)
+                    built.add(goal)
+                future = pool.submit(
+                    solve_one,
+                    puzzle.initial_state,
+                    puzzle.goal_state,
+                    algorithm,
+                    timeout,
+                )
+            except Exception as e:
+                yield index, None, failure(e)
+                continue
+            pending[future] = (index, puzzle)
+
+            # Only submit more work once something has finished
+            while len(pending) >= limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield finish(pending.pop(future), future, algorithm, cache)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(pending.pop(future), future, algorithm, cache)
+
+
+def finish(task, future, algorithm, cache=None):
+    """
+        Collect a finished solve from the pool and store it in the cache if there
+        is one, task is the (index, puzzle) it was submitted for
+        Returns (index, actions, metrics)
+    """
+    index, puzzle = task
+    try:
+        actions, metrics = future.result()
+    except Exception as e:
+        # Failures are not cached, they may not happen again
+        return index, None, failure(e)
+    if cache is not None:
+        cache.put(puzzle, algorithm, actions, metrics)
+        metrics = dict(metrics, cache_hit=False)
+    return index, actions, metrics
+
+
+def failure(error):
+    """
+        Metrics for a solve that raised error instead of finishing
+        ValueErrors already describe the bad puzzle, other errors keep their type
+    """
+    if isinstance(error, ValueError):
+        message = str(error)
+    else:
+        message = f"{type(error).__name__}: {error}"
+    return {
+        "error": message,
+        "expanded_nodes": 0,
+        "time": 0.0,
+        "timed_out": False,
+        "unsolvable": False,
+    }
+
+
+def add_result(results, algo_name, depth, metrics):
+    """
+        Record one solve in the results dict used by the visualization plots
+        Shape: {algorithm: {"depths": [], "times": [], "nodes": [], "queue": []}}
+    """
+    entry = results.setdefault(
+        algo_name, {"depths": [], "times": [], "nodes": [], "queue": []}
+    )
+    entry["depths"].append(depth)
+    entry["times"].append(metrics["time"])
+    entry["nodes"].append(metrics["expanded_nodes"])
+    entry["queue"].append(metrics["max_queue_size"])
+    return results
@@ -0,0 +1,320 @@
+"""
+    Purpose: Benchmark the search on the test cases -> open list backends side by side,
+    pattern database build and lookup cost, 15-puzzle solve rates, distance table
+    solve latency, where the time goes inside one instrumented solve, batched NumPy
+    heuristics against the scalar ones, memory-bounded open lists that spill to disk,
+    HDA* speedup and load balance by number of worker processes
+"""
+
+import os
+import time
+import tracemalloc
+from functools import partial
+from queue import PriorityQueue
+
+from instrumentation import SearchInstrumentation
+from open_list import BucketOpenList, HeapOpenList, SpillingOpenList
+from parallel import hda_star
+from puzzle import Puzzle, make_goal_state
+from search import (
+    a_star_manhattan,
+    a_star_misplaced,
+    generic_search,
+    ida_star,
+    table_search,
+    uniform_cost_search,
+)
+from test.test_cases import fifteen_puzzle_test_cases, test_cases
+
+GOAL_STATE = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
+
+ALGORITHMS = [
+    ("A* Manhattan", a_star_manhattan),
+    ("A* Misplaced Tile", a_star_misplaced),
+    ("Uniform Cost Search", uniform_cost_search),
+]
+
+OPEN_LISTS = [
+    ("PriorityQueue", PriorityQueue),
+    ("heapq", HeapOpenList),
+    ("Bucket LIFO", BucketOpenList),
+    ("Bucket FIFO", partial(BucketOpenList, lifo=False)),
+]
+
+
+def benchmark_open_lists(
+    cases=test_cases, algorithms=ALGORITHMS, open_lists=OPEN_LISTS
+):
+    """
+        Solve every test case with every algorithm on every open list backend
+        Returns {(algorithm, backend): [(depth, expanded nodes, seconds), ...]}
+    """
+    results = {}
+    for algo_name, algo in algorithms:
+        for backend_name, backend in open_lists:
+            runs = results.setdefault((algo_name, backend_name), [])
+            for test_case in cases:
+                puzzle = Puzzle(test_case["initial_state"], GOAL_STATE)
+                _, _, metrics = generic_search(puzzle, algo, open_list=backend)
+                runs.append(
+                    (test_case["depth"], metrics["expanded_nodes"], metrics["time"])
+                )
+    return results
+
+
+def print_open_list_report(results):
+    """
+        Print expansions per second for each backend, one row per algorithm and depth
+    """
+    backends = [name for name, _ in OPEN_LISTS]
+    print(f"{'Algorithm':<22}{'Depth':>6}" + "".join(f"{b:>16}" for b in backends))
+    for algo_name, _ in ALGORITHMS:
+        per_backend = [results[(algo_name, b)] for b in backends]
+        for row in zip(*per_backend):
+            depth = row[0][0]
+            rates = [
+                f"{nodes / seconds:>16,.0f}" if seconds > 0 else f"{'-':>16}"
+                for _, nodes, seconds in row
+            ]
+            print(f"{algo_name:<22}{depth:>6}" + "".join(rates))
+
+        # Totals across all depths, this is the number to compare backends on
+        totals = [
+            sum(nodes for _, nodes, _ in runs) / sum(s for _, _, s in runs)
+            for runs in per_backend
+        ]
+        print(f"{algo_name:<22}{'all':>6}" + "".join(f"{t:>16,.0f}" for t in totals))
+
+
+def benchmark_pattern_db(cases=test_cases, repeat=2000):
+    """
+        Report the pattern database's build time, file size and lookup rate,
+        with the Manhattan Distance lookup rate next to it for reference
+    """
+    puzzle = Puzzle(GOAL_STATE, GOAL_STATE)
+    db = puzzle.get_pattern_db()
+    states = [
+        Puzzle(case["initial_state"], GOAL_STATE).initial_packed for case in cases
+    ]
+
+    rates = {}
+    for name in ("pdb", "manhattan"):
+        full, _ = puzzle.get_heuristic(name)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for state in states:
+                full(state)
+        rates[name] = repeat * len(states) / (time.perf_counter() - start)
+
+    print(f"Groups: {db.groups}")
+    print(f"Build time: {db.build_time:.3f} s")
+    print(f"File size: {db.file_size:,} bytes")
+    print(f"Lookups per second: {rates['pdb']:,.0f}")
+    print(f"Manhattan lookups per second: {rates['manhattan']:,.0f}")
+
+
+def benchmark_fifteen_puzzle(cases=fifteen_puzzle_test_cases, timeout=60):
+    """
+        Solve the 15-puzzle test cases with IDA* and A*, printing nodes expanded,
+        time and expansions per second for each
+    """
+    goal_state = make_goal_state(4, 4)
+    searches = [
+        ("IDA* Manhattan", partial(ida_star, heuristic="manhattan")),
+        ("IDA* Pattern Database", partial(ida_star, heuristic="pdb")),
+        ("A* Manhattan", partial(generic_search, algorithm=a_star_manhattan)),
+    ]
+
+    # Build or load the 15-puzzle pattern database before anything is timed
+    Puzzle(goal_state, goal_state).get_pattern_db()
+
+    print(f"{'Search':<24}{'Depth':>6}{'Nodes':>12}{'Seconds':>10}{'Nodes/s':>12}")
+    for search_name, search in searches:
+        for test_case in cases:
+            puzzle = Puzzle(test_case["initial_state"], goal_state)
+            result, _, metrics = search(puzzle, timeout=timeout)
+            nodes, seconds = metrics["expanded_nodes"], metrics["time"]
+            depth = test_case["depth"] if result is not None else "-"
+            print(
+                f"{search_name:<24}{depth:>6}{nodes:>12,}{seconds:>10.2f}"
+                f"{nodes / seconds if seconds > 0 else 0:>12,.0f}"
+            )
+
+
+def benchmark_distance_table(cases=test_cases, repeat=200):
+    """
+        Report the distance table's build time, file size and solve latency
+    """
+    puzzles = [Puzzle(case["initial_state"], GOAL_STATE) for case in cases]
+    db = puzzles[0].get_distance_table()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for puzzle in puzzles:
+            table_search(puzzle)
+    latency = (time.perf_counter() - start) / (repeat * len(puzzles))
+
+    print(f"Build time: {db.build_time:.3f} s")
+    print(f"File size: {db.file_size:,} bytes")
+    print(f"Mean solve latency: {latency * 1e6:,.0f} us")
+
+
+def breadth_first_layer(puzzle, depth):
+    """
+        Every state exactly depth moves from the puzzle's initial state
+    """
+    seen = {puzzle.initial_packed}
+    layer = [puzzle.initial_packed]
+    for _ in range(depth):
+        next_layer = []
+        for state in layer:
+            for child, _, _ in puzzle.get_children(state):
+                if child not in seen:
+                    seen.add(child)
+                    next_layer.append(child)
+        layer = next_layer
+    return layer
+
+
+def benchmark_vectorized(depths=(8, 14, 20), repeat=5):
+    """
+        Score breadth-first layers of the 8-puzzle with the scalar heuristics and
+        with the batched NumPy ones, printing boards per second for each
+        The batched rate is given with and without unpacking the states first
+    """
+    puzzle = Puzzle(GOAL_STATE, GOAL_STATE)
+    batch = puzzle.get_batch_heuristics()
+
+    def rate(function, count):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return repeat * count / (time.perf_counter() - start)
+
+    print(
+        f"{'Heuristic':<12}{'Depth':>6}{'Boards':>9}"
+        f"{'Scalar/s':>14}{'Batch/s':>14}{'Unpacked/s':>14}"
+    )
+    for name in ("manhattan", "misplaced"):
+        full, _ = puzzle.get_heuristic(name)
+        score = getattr(batch, name)
+        for depth in depths:
+            states = breadth_first_layer(puzzle, depth)
+            boards = batch.unpack(states)
+            scalar = rate(lambda: [full(state) for state in states], len(states))
+            packed = rate(lambda: batch.score(states, name), len(states))
+            unpacked = rate(lambda: score(boards), len(states))
+            print(
+                f"{name:<12}{depth:>6}{len(states):>9,}"
+                f"{scalar:>14,.0f}{packed:>14,.0f}{unpacked:>14,.0f}"
+            )
+
+
+def benchmark_spilling(
+    test_case=test_cases[-1], budgets=(None, 1_000_000, 200_000), repeat=3
+):
+    """
+        Solve one test case with Uniform Cost Search under each frontier memory
+        budget, None for the plain heap, printing the time, the traced memory peak,
+        the most frontier nodes held in memory and their size in MB, and how much
+        of the frontier went to disk
+    """
+    puzzle = Puzzle(test_case["initial_state"], GOAL_STATE)
+    print(
+        f"{'Budget':>10}{'Seconds':>9}{'Peak MB':>9}{'Res nodes':>10}"
+        f"{'Res MB':>8}{'Spilled':>10}{'Bytes':>12}"
+    )
+    for budget in budgets:
+        open_list = HeapOpenList
+        if budget is not None:
+            open_list = partial(SpillingOpenList, memory_budget=budget)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            generic_search(puzzle, uniform_cost_search, open_list=open_list)
+        seconds = (time.perf_counter() - start) / repeat
+
+        tracemalloc.start()
+        _, _, metrics = generic_search(
+            puzzle, uniform_cost_search, open_list=open_list
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # The plain heap has no per-node size estimate
+        resident_mb = "-"
+        if "peak_resident_bytes" in metrics:
+            resident_mb = f"{metrics['peak_resident_bytes'] / 2**20:.1f}"
+        print(
+            f"{budget or '-':>10}{seconds:>9.2f}{peak / 2**20:>9.1f}"
+            f"{metrics.get('peak_resident_nodes', metrics['max_queue_size']):>10,}"
+            f"{resident_mb:>8}"
+            f"{metrics.get('spilled_nodes', 0):>10,}"
+            f"{metrics.get('spilled_bytes', 0):>12,}"
+        )
+
+
+def benchmark_hda(
+    cases=fifteen_puzzle_test_cases[:8], workers=(1, 2, 4, 8), timeout=60
+):
+    """
+        Solve the 15-puzzle test cases with HDA* on each number of workers, printing
+        the speedup over one worker and the load balance: the busiest worker's
+        expansions over the mean, 1.00 is a perfect split
+    """
+    goal_state = make_goal_state(4, 4)
+    print(
+        f"{'Workers':>8}{'Seconds':>10}{'Speedup':>9}{'Nodes':>10}"
+        f"{'Nodes/s':>11}{'Balance':>9}"
+    )
+    baseline = None
+    for count in workers:
+        seconds = nodes = 0
+        balance = []
+        for test_case in cases:
+            puzzle = Puzzle(test_case["initial_state"], goal_state)
+            _, _, metrics = hda_star(
+                puzzle, "linear_conflict", workers=count, timeout=timeout
+            )
+            seconds += metrics["time"]
+            nodes += metrics["expanded_nodes"]
+            per_worker = metrics["worker_expansions"]
+            balance.append(max(per_worker) * len(per_worker) / sum(per_worker))
+        baseline = baseline or seconds
+        print(
+            f"{count:>8}{seconds:>10.2f}{baseline / seconds:>9.2f}{nodes:>10,}"
+            f"{nodes / seconds:>11,.0f}{sum(balance) / len(balance):>9.2f}"
+        )
+
+
+def benchmark_instrumentation(test_case=test_cases[-1], profile=None):
+    """
+        Solve one test case with each algorithm and print the time per phase,
+        profile is passed on to SearchInstrumentation ("cprofile" or "tracemalloc")
+    """
+    puzzle = Puzzle(test_case["initial_state"], GOAL_STATE)
+    for algo_name, algo_func in ALGORITHMS:
+        instrument = SearchInstrumentation(sample_interval=10000, profile=profile)
+        _, _, metrics = generic_search(puzzle, algo_func, instrument=instrument)
+        print(f"{algo_name}: {metrics['expanded_nodes']:,} nodes")
+        instrument.print_report()
+        print()
+
+
+if __name__ == "__main__":
+    print("Expansions per second by open list backend\n")
+    print_open_list_report(benchmark_open_lists())
+    print("\nPattern database\n")
+    benchmark_pattern_db()
+    print("\nDistance table\n")
+    benchmark_distance_table()
+    print("\n15-puzzle\n")
+    benchmark_fifteen_puzzle()
+    print("\nTime per phase\n")
+    benchmark_instrumentation()
+    print("\nBatched heuristics\n")
+    benchmark_vectorized()
+    print("\nFrontier spilled to disk\n")
+    benchmark_spilling()
+    print(f"\nHDA* on {os.cpu_count()} CPUs\n")
+    benchmark_hda()
@@ -0,0 +1,501 @@
+"""
+    Purpose: Reproducible benchmark suite -> seeded random instances, repeated timed
+    runs with median and IQR, JSON/CSV results, regression checks, offline plots
+
+    python benchmark_suite.py run --depths 8 16 24 --per-depth 5 -o results.json
+    python benchmark_suite.py run --uniform 20 --seed 1 -o results.csv
+    python benchmark_suite.py compare baseline.json results.json
+    python benchmark_suite.py plot results.json --output-dir output
+    python benchmark_suite.py startup -o startup.json
+
+    Instances bucketed by optimal depth are drawn from the distance table, so they
+    need a board with at most 9 cells. Every instance gets warmup runs first, which
+    also builds any table its heuristic needs, then repeat timed runs. Peak memory
+    is measured with tracemalloc in one more run, since tracing slows the search down.
+
+    The startup command times whole runs of main.py --state, from launching Python
+    to exiting, and lists the slowest imports reported by python -X importtime. Its
+    record compares like any other, by time since it expands no nodes.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import distance_table
+from batch import ALGORITHMS
+from puzzle import Puzzle, make_goal_state
+from search import TIMEOUT, solve
+
+# Algorithms run when none are given, by their batch.ALGORITHMS name
+DEFAULT_ALGORITHMS = ("manhattan", "misplaced", "conflict", "walking", "pdb", "ida")
+DEFAULT_DEPTHS = (4, 8, 12, 16, 20, 24, 28)
+
+# Relative change that counts as a regression in compare
+THRESHOLD = 0.10
+# Buckets faster than this in the baseline are too noisy to compare, in seconds
+MIN_TIME = 0.001
+
+# Puzzle solved by the startup runs, the default puzzle of main.py
+STARTUP_BOARD = "072461358"
+# Slowest imports listed by the startup command
+TOP_IMPORTS = 10
+
+# Columns of a results file, in the order they are written to CSV
+FIELDS = (
+    "algorithm",
+    "depth",
+    "instances",
+    "runs",
+    "timeouts",
+    "time_median",
+    "time_iqr",
+    "nodes_median",
+    "throughput_median",
+    "throughput_iqr",
+    "max_queue_median",
+    "peak_memory_median",
+)
+
+
+def generate_instances(count, seed=0, depths=None, rows=3, cols=3):
+    """
+        Seeded random solvable instances, in the format of test/test_cases.py
+        With depths, up to count instances of each optimal depth, drawn uniformly from
+        every state at that depth. Without, count uniformly random solvable boards,
+        their depth is None on boards too big for a distance table.
+    """
+    rng = random.Random(seed)
+    goal_state = make_goal_state(rows, cols)
+    goal = Puzzle(goal_state, goal_state)
+    table = None
+    if goal.size <= distance_table.MAX_CELLS:
+        table = goal.get_distance_table()
+    elif depths is not None:
+        raise ValueError(
+            f"Depth buckets need a distance table, at most "
+            f"{distance_table.MAX_CELLS} cells."
+        )
+
+    def board(tiles):
+        return [tiles[r * cols : (r + 1) * cols] for r in range(rows)]
+
+    instances = []
+    if depths is not None:
+        by_depth = table.ranks_by_depth()
+        for depth in depths:
+            ranks = by_depth.get(depth, [])
+            for r in rng.sample(ranks, min(count, len(ranks))):
+                tiles = distance_table.unrank(r, goal.size)
+                instances.append({"initial_state": board(tiles), "depth": depth})
+        return instances
+
+    tiles = list(range(goal.size))
+    while len(instances) < count:
+        rng.shuffle(tiles)
+        puzzle = Puzzle(board(list(tiles)), goal_state)
+        if puzzle.is_solvable():
+            depth = None
+            if table is not None:
+                depth = table.distance(puzzle, puzzle.initial_packed)
+            instances.append({"initial_state": puzzle.initial_state, "depth": depth})
+    return instances
+
+
+def median_iqr(values):
+    """
+        Median and interquartile range of a list of numbers
+    """
+    if len(values) < 2:
+        return values[0], 0.0
+    q1, q2, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    return q2, q3 - q1
+
+
+def peak_memory(puzzle, algorithm, timeout):
+    """
+        Most memory allocated at once during one solve, in bytes
+    """
+    tracemalloc.start()
+    try:
+        solve(puzzle, algorithm, timeout)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_suite(instances, algorithms, repeat=5, warmup=1, timeout=TIMEOUT, memory=True):
+    """
+        Time every algorithm on every instance, repeat times after warmup runs
+        algorithms are names from batch.ALGORITHMS
+        Returns one record per (algorithm, depth), with the fields in FIELDS
+    """
+    records = []
+    for name in algorithms:
+        algorithm = ALGORITHMS[name]
+        buckets = {}
+        for case in instances:
+            state = case["initial_state"]
+            puzzle = Puzzle(state, make_goal_state(len(state), len(state[0])))
+            if case["depth"] not in buckets:
+                buckets[case["depth"]] = {
+                    "instances": 0,
+                    "timeouts": 0,
+                    "times": [],
+                    "throughputs": [],
+                    "nodes": [],
+                    "queue": [],
+                    "peaks": [],
+                }
+            bucket = buckets[case["depth"]]
+            bucket["instances"] += 1
+
+            for _ in range(warmup):
+                solve(puzzle, algorithm, timeout)
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _, _, metrics = solve(puzzle, algorithm, timeout)
+                elapsed = time.perf_counter() - start
+                if metrics["timed_out"]:
+                    bucket["timeouts"] += 1
+                bucket["times"].append(elapsed)
+                bucket["throughputs"].append(metrics["expanded_nodes"] / elapsed)
+                bucket["nodes"].append(metrics["expanded_nodes"])
+                bucket["queue"].append(metrics["max_queue_size"])
+            if memory:
+                bucket["peaks"].append(peak_memory(puzzle, algorithm, timeout))
+
+        # Depth is None for uniform instances on boards without a distance table
+        for depth in sorted(buckets, key=lambda d: (d is None, d or 0)):
+            bucket = buckets[depth]
+            time_median, time_iqr = median_iqr(bucket["times"])
+            throughput_median, throughput_iqr = median_iqr(bucket["throughputs"])
+            records.append(
+                {
+                    "algorithm": name,
+                    "depth": depth,
+                    "instances": bucket["instances"],
+                    "runs": len(bucket["times"]),
+                    "timeouts": bucket["timeouts"],
+                    "time_median": time_median,
+                    "time_iqr": time_iqr,
+                    "nodes_median": statistics.median(bucket["nodes"]),
+                    "throughput_median": throughput_median,
+                    "throughput_iqr": throughput_iqr,
+                    "max_queue_median": statistics.median(bucket["queue"]),
+                    "peak_memory_median": (
+                        statistics.median(bucket["peaks"]) if bucket["peaks"] else None
+                    ),
+                }
+            )
+            print(
+                f"{name:<12}{str(depth):>6}{time_median * 1000:>12.2f} ms"
+                f"{throughput_median:>14,.0f} nodes/s",
+                file=sys.stderr,
+            )
+    return records
+
+
+def import_times(report):
+    """
+        Cumulative microseconds of every top-level import in python -X importtime
+        output, slowest first
+        Imports pulled in by another import are counted in that import's time
+    """
+    times = []
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented under the import that pulled them in
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times.append((name.strip(), int(cumulative)))
+    return sorted(times, key=lambda item: item[1], reverse=True)
+
+
+def measure_startup(board=STARTUP_BOARD, algorithm="manhattan", repeat=10, warmup=1):
+    """
+        Time repeat runs of main.py --state board --algo algorithm in a new process
+        each, after warmup runs that fill the OS file cache
+        Returns (record, imports): the record has the fields in FIELDS with
+        "startup" as its algorithm, imports is import_times of one more run
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    command = [sys.executable, script, "--state", board, "--algo", algorithm]
+
+    times = []
+    for run in range(warmup + repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        if run >= warmup:
+            times.append(time.perf_counter() - start)
+
+    report = subprocess.run(
+        [sys.executable, "-X", "importtime"] + command[1:],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+
+    time_median, time_iqr = median_iqr(times)
+    record = dict.fromkeys(FIELDS)
+    record.update(
+        {
+            "algorithm": "startup",
+            "instances": 1,
+            "runs": len(times),
+            "timeouts": 0,
+            "time_median": time_median,
+            "time_iqr": time_iqr,
+        }
+    )
+    return record, import_times(report)
+
+
+def save_results(path, records, meta):
+    """
+        Write records to path, as CSV if it ends in .csv and JSON otherwise
+        JSON files also keep meta: the settings, instances and machine of the run
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as f:
+            json.dump({"meta": meta, "results": records}, f, indent=2)
+
+
+def load_results(path):
+    """
+        Read the records written by save_results
+    """
+    if not path.endswith(".csv"):
+        with open(path) as f:
+            return json.load(f)["results"]
+
+    def number(value):
+        if value in ("", "None"):
+            return None
+        value = float(value)
+        return int(value) if value.is_integer() else value
+
+    with open(path, newline="") as f:
+        return [
+            {key: value if key == "algorithm" else number(value) for key, value in row}
+            for row in map(dict.items, csv.DictReader(f))
+        ]
+
+
+def compare(baseline, current, threshold=THRESHOLD, min_time=MIN_TIME):
+    """
+        Compare two lists of records bucket by bucket and print the changes
+        A bucket regressed when its median throughput dropped or its median peak
+        memory grew by more than threshold, startup records have no throughput and
+        are compared by their median time instead
+        A baseline bucket with no throughput, e.g. because every run timed out, has
+        nothing to compare against and is reported as incomparable
+        Returns the (algorithm, depth, reason) of every regression
+    """
+    base = {(r["algorithm"], r["depth"]): r for r in baseline}
+    regressions = []
+    print(f"{'Algorithm':<12}{'Depth':>6}{'Nodes/s':>14}{'Change':>9}{'Memory':>9}")
+    for record in current:
+        key = (record["algorithm"], record["depth"])
+        old = base.get(key)
+        if old is None or old["time_median"] < min_time:
+            continue
+
+        if record["throughput_median"] is None:
+            speed = old["time_median"] / record["time_median"] - 1
+            rate = "-"
+        elif not old["throughput_median"]:
+            print(
+                f"{key[0]:<12}{str(key[1]):>6}{record['throughput_median']:>14,.0f}"
+                f"{'-':>9}{'-':>9}  INCOMPARABLE (no baseline throughput)"
+            )
+            continue
+        else:
+            speed = record["throughput_median"] / old["throughput_median"] - 1
+            rate = f"{record['throughput_median']:,.0f}"
+        memory = None
+        if old.get("peak_memory_median") and record.get("peak_memory_median"):
+            memory = record["peak_memory_median"] / old["peak_memory_median"] - 1
+
+        reasons = []
+        if speed < -threshold:
+            reasons.append("throughput" if rate != "-" else "time")
+        if memory is not None and memory > threshold:
+            reasons.append("memory")
+        regressions += [(key[0], key[1], reason) for reason in reasons]
+
+        memory_text = "-" if memory is None else f"{memory:+.0%}"
+        flag = "  REGRESSION" if reasons else ""
+        print(
+            f"{key[0]:<12}{str(key[1]):>6}{rate:>14}"
+            f"{speed:>+9.0%}{memory_text:>9}{flag}"
+        )
+    return regressions
+
+
+def plot_results(records, output_dir="output", show=False):
+    """
+        Draw the visualization plots from records, headless unless show is True
+    """
+    import matplotlib
+
+    if not show:
+        matplotlib.use("Agg")
+    from visualization import (
+        plot_max_queue_vs_depth,
+        plot_nodes_vs_depth,
+        plot_time_vs_depth,
+    )
+
+    # Same shape as the results of main.test(), buckets without a depth are left out
+    results = {}
+    for record in records:
+        if record["depth"] is None:
+            continue
+        entry = results.setdefault(
+            record["algorithm"], {"depths": [], "times": [], "nodes": [], "queue": []}
+        )
+        entry["depths"].append(record["depth"])
+        entry["times"].append(record["time_median"])
+        entry["nodes"].append(record["nodes_median"])
+        entry["queue"].append(record["max_queue_median"])
+
+    plot_time_vs_depth(results, output_dir, show)
+    plot_nodes_vs_depth(results, output_dir, show)
+    plot_max_queue_vs_depth(results, output_dir, show)
+
+
+def parse_args():
+    """
+        Command line options for the run, compare, plot and startup commands
+    """
+    parser = argparse.ArgumentParser(description="8-Puzzle benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time the algorithms and save the results")
+    run.add_argument("-o", "--output", default="results.json", help=".json or .csv")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--rows", type=int, default=3)
+    run.add_argument("--cols", type=int, default=3)
+    run.add_argument("--depths", type=int, nargs="+", default=list(DEFAULT_DEPTHS))
+    run.add_argument("--per-depth", type=int, default=5, help="instances per depth")
+    run.add_argument(
+        "--uniform",
+        type=int,
+        metavar="COUNT",
+        help="COUNT uniformly random instances instead of depth buckets",
+    )
+    run.add_argument(
+        "--algorithms",
+        nargs="+",
+        choices=sorted(ALGORITHMS),
+        default=list(DEFAULT_ALGORITHMS),
+    )
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--warmup", type=int, default=1)
+    run.add_argument("--timeout", type=float, default=TIMEOUT)
+    run.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc run"
+    )
+
+    check = commands.add_parser("compare", help="flag regressions between two files")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--threshold", type=float, default=THRESHOLD)
+    check.add_argument("--min-time", type=float, default=MIN_TIME)
+
+    plot = commands.add_parser("plot", help="draw the plots from a results file")
+    plot.add_argument("results")
+    plot.add_argument("--output-dir", default="output")
+    plot.add_argument("--show", action="store_true", help="also open the windows")
+
+    startup = commands.add_parser("startup", help="time main.py --state from launch")
+    startup.add_argument("-o", "--output", default="startup.json", help=".json or .csv")
+    startup.add_argument("--state", default=STARTUP_BOARD)
+    startup.add_argument("--algorithm", choices=sorted(ALGORITHMS), default="manhattan")
+    startup.add_argument("--repeat", type=int, default=10)
+    startup.add_argument("--warmup", type=int, default=1)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "run":
+        if args.uniform is not None:
+            instances = generate_instances(
+                args.uniform, args.seed, None, args.rows, args.cols
+            )
+        else:
+            instances = generate_instances(
+                args.per_depth, args.seed, args.depths, args.rows, args.cols
+            )
+        records = run_suite(
+            instances,
+            args.algorithms,
+            args.repeat,
+            args.warmup,
+            args.timeout,
+            not args.no_memory,
+        )
+        meta = {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "timeout": args.timeout,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "instances": instances,
+        }
+        save_results(args.output, records, meta)
+        print(f"Wrote {len(records)} results to {args.output}", file=sys.stderr)
+    elif args.command == "compare":
+        regressions = compare(
+            load_results(args.baseline),
+            load_results(args.current),
+            args.threshold,
+            args.min_time,
+        )
+        if regressions:
+            print(f"{len(regressions)} regressions")
+            sys.exit(1)
+    elif args.command == "plot":
+        plot_results(load_results(args.results), args.output_dir, args.show)
+    else:
+        record, imports = measure_startup(
+            args.state, args.algorithm, args.repeat, args.warmup
+        )
+        print(
+            f"startup{record['time_median'] * 1000:>12.2f} ms"
+            f" (IQR {record['time_iqr'] * 1000:.2f} ms)",
+            file=sys.stderr,
+        )
+        for name, microseconds in imports[:TOP_IMPORTS]:
+            print(f"  {name:<28}{microseconds / 1000:>8.2f} ms", file=sys.stderr)
+        meta = {
+            "state": args.state,
+            "algorithm": args.algorithm,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "imports": dict(imports[:TOP_IMPORTS]),
+        }
+        save_results(args.output, [record], meta)
+        print(f"Wrote the startup time to {args.output}", file=sys.stderr)
@@ -0,0 +1,216 @@
+"""
+    Purpose: Bidirectional search -> forward from the initial state and backward from
+    the goal, meeting in the middle
+
+    Both directions use the MM rule: a node is queued with priority
+    pr(n) = max(g(n) + h(n), 2 g(n)), which makes sure neither side searches past
+    the midpoint of an optimal path. With no heuristic this is a plain bidirectional
+    uniform cost search. The search stops once the best path found through a state
+    seen from both sides costs no more than the lowest priority left in either queue.
+"""
+
+import time
+from collections import defaultdict
+
+from cancellation import CancellationToken
+from node import REVERSE_ACTIONS, Node
+from open_list import HeapOpenList
+from puzzle import Puzzle
+from search import TIMEOUT, build_solution, stop_metrics, unsolvable_result
+
+# Heuristics both directions can use, the backward one aims at each start board
+# and the pattern database, distance table and walking distance tables are built
+# per goal, so they would be built (and cached) again for every puzzle
+HEURISTICS = ("manhattan", "misplaced", "linear_conflict")
+
+
+class Frontier:
+    def __init__(self, puzzle, heuristic):
+        """
+            One direction of the search: its open list, best node for every state it
+            has generated, and the states it has expanded
+            puzzle is the forward puzzle, or the puzzle with initial and goal swapped
+        """
+        self.puzzle = puzzle
+        self.delta = None
+        heuristic_cost = 0
+        if heuristic is not None:
+            full, self.delta = puzzle.get_heuristic(heuristic)
+            heuristic_cost = full(puzzle.initial_packed)
+
+        root = Node(
+            state=puzzle.initial_packed,
+            path_cost=0,
+            heuristic_cost=heuristic_cost,
+            blank=puzzle.find_blank_tile(puzzle.initial_packed),
+        )
+        self.nodes = HeapOpenList()
+        self.nodes.put((self.priority(root), root))
+        self.best = {root.state: root}
+        self.closed = set()
+        self.expanded_nodes = 0
+
+    def priority(self, node):
+        """
+            MM priority, max(f(n), 2 g(n))
+        """
+        return max(node.total_cost(), 2 * node.path_cost)
+
+    def min_priority(self):
+        """
+            Lowest priority left in the open list, dropping stale entries on the way
+            Returns None once the open list is empty
+        """
+        while not self.nodes.empty():
+            priority, node = self.nodes.heap[0]
+            if node.state in self.closed or self.best[node.state] is not node:
+                self.nodes.get()
+                continue
+            return priority
+        return None
+
+
+def bidirectional_search(puzzle, heuristic=None, timeout=TIMEOUT, cancel=None):
+    """
+        Bidirectional search with MM priorities, front-to-end heuristics if given
+        heuristic is a name from HEURISTICS, None searches uninformed
+        cancel is an optional CancellationToken, see generic_search
+        Returns the solution node, depth, and metrics like generic_search
+        Raises ValueError for any other heuristic
+    """
+    if heuristic is not None and heuristic not in HEURISTICS:
+        raise ValueError(
+            f"Bidirectional search only supports the {', '.join(HEURISTICS)} "
+            "heuristics."
+        )
+    start = time.time()
+    if not puzzle.is_solvable():
+        return unsolvable_result(start)
+    if cancel is None:
+        cancel = CancellationToken(timeout)
+
+    # The backward search is a forward search on the puzzle with the initial and
+    # goal states swapped, so its heuristic estimates the distance to the start
+    backward_puzzle = Puzzle(puzzle.goal_state, puzzle.initial_state)
+    forward = Frontier(puzzle, heuristic)
+    backward = Frontier(backward_puzzle, heuristic)
+
+    depth = defaultdict(int)
+    duplicates_pruned = 0
+    max_queue_size = 1
+    stopped = False
+
+    # Cheapest path found so far, as the pair of nodes that meet at a common state
+    best_cost = None
+    meeting = None
+    if puzzle.initial_packed == puzzle.goal_packed:
+        best_cost = 0
+        meeting = (
+            forward.best[puzzle.initial_packed],
+            backward.best[puzzle.goal_packed],
+        )
+
+    while True:
+        forward_min = forward.min_priority()
+        backward_min = backward.min_priority()
+        if forward_min is None or backward_min is None:
+            break
+
+        # Stop once no path through the open lists can beat the best one found
+        if best_cost is not None and best_cost <= min(forward_min, backward_min):
+            break
+
+        # Check the deadline and budgets every check_interval expansions, and stop
+        # the moment the node budget is reached
+        expanded_nodes = forward.expanded_nodes + backward.expanded_nodes
+        if (
+            expanded_nodes % cancel.check_interval == 0
+            or expanded_nodes == cancel.node_budget
+        ) and cancel.check(expanded_nodes):
+            stopped = True
+            break
+
+        # Expand the side with the lower priority, forward on ties
+        if forward_min <= backward_min:
+            side, other = forward, backward
+        else:
+            side, other = backward, forward
+
+        _, node = side.nodes.get()
+        side.closed.add(node.state)
+        side.expanded_nodes += 1
+        depth[node.path_cost] += 1
+
+        for successor_state, successor_blank, action in side.puzzle.get_children(
+            node.state, node.blank
+        ):
+            # Drop children whose g(n) is no better than the best already seen
+            child_cost = node.path_cost + 1
+            seen = side.best.get(successor_state)
+            if seen is not None and seen.path_cost <= child_cost:
+                duplicates_pruned += 1
+                continue
+
+            child_heuristic = 0
+            if side.delta is not None:
+                tile = side.puzzle.get_tile(node.state, successor_blank)
+                child_heuristic = node.heuristic_cost + side.delta(
+                    successor_state, tile, successor_blank, node.blank
+                )
+
+            child = Node(
+                state=successor_state,
+                parent=node,
+                action=action,
+                path_cost=child_cost,
+                heuristic_cost=child_heuristic,
+                blank=successor_blank,
+            )
+            side.best[successor_state] = child
+            side.closed.discard(successor_state)
+            side.nodes.put((side.priority(child), child))
+
+            # The two searches meet when the child was also reached from the other side
+            match = other.best.get(successor_state)
+            if match is not None:
+                cost = child_cost + match.path_cost
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    meeting = (child, match) if side is forward else (match, child)
+
+        queue_size = forward.nodes.qsize() + backward.nodes.qsize()
+        if queue_size > max_queue_size:
+            max_queue_size = queue_size
+
+    expanded_nodes = forward.expanded_nodes + backward.expanded_nodes
+    metrics = {
+        "expanded_nodes": expanded_nodes,
+        "max_queue_size": max_queue_size,
+        "duplicates_pruned": duplicates_pruned,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": False,
+        "forward_expanded": forward.expanded_nodes,
+        "backward_expanded": backward.expanded_nodes,
+    }
+    if stopped:
+        # Report the next node the forward search would have expanded
+        frontier = forward.nodes.heap[0][1] if forward.nodes.heap else None
+        return None, depth, stop_metrics(metrics, cancel, frontier)
+    if meeting is None:
+        return None, depth, metrics
+
+    return build_solution(puzzle, splice(*meeting), heuristic), depth, metrics
+
+
+def splice(forward_node, backward_node):
+    """
+        Join the two halves of a path that meet at the same state
+        The backward half was searched from the goal, so its actions are undone in
+        reverse order to carry on from the meeting state to the goal
+        Returns the full list of actions from the initial state
+    """
+    actions = forward_node.get_actions()
+    for action in reversed(backward_node.get_actions()):
+        actions.append(REVERSE_ACTIONS[action])
+    return actions
@@ -0,0 +1,114 @@
+"""
+    Purpose: Stop a search early -> deadline, node and memory budgets, and cancelling
+    from another thread or an asyncio task
+
+    Searches take a CancellationToken and call check() once every check_interval
+    expansions instead of reading the clock on every iteration, and also as soon as
+    they have expanded node_budget nodes, so the budget is never overshot. A stopped search
+    returns what it has so far: its metrics, with the reason it stopped in
+    metrics["cancelled"] and the best node on its frontier in metrics["frontier"].
+"""
+
+import os
+import threading
+import time
+
+# Expansions between two checks of the token
+CHECK_INTERVAL = 1024
+
+# Reasons a search was stopped, reported in metrics["cancelled"]
+CANCELLED = "cancelled"
+DEADLINE = "deadline"
+NODE_BUDGET = "node_budget"
+MEMORY_BUDGET = "memory_budget"
+
+
+def current_memory():
+    """
+        Resident memory of this process in bytes
+        Uses /proc where there is one, otherwise the peak reported by getrusage
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CancellationToken:
+    def __init__(
+        self,
+        timeout=None,
+        node_budget=None,
+        memory_budget=None,
+        check_interval=CHECK_INTERVAL,
+        event=None,
+    ):
+        """
+            timeout: seconds from now until the deadline, None for no deadline
+            node_budget: most expansions allowed, None for no limit
+            memory_budget: most resident memory allowed in bytes, None for no limit
+            check_interval: expansions between checks, the search reads this
+            event: anything with set() and is_set(), e.g. a multiprocessing Event to
+            cancel a search in another process, a threading.Event by default
+        """
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.node_budget = node_budget
+        self.memory_budget = memory_budget
+        self.check_interval = check_interval
+        self.event = threading.Event() if event is None else event
+        self.reason = None
+
+    def cancel(self, reason=CANCELLED):
+        """
+            Stop the search at its next check, safe to call from any thread
+            From an asyncio task call it directly, it never blocks
+        """
+        if self.reason is None:
+            self.reason = reason
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def remaining(self):
+        """
+            Seconds left until the deadline, None if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self, expanded_nodes=0):
+        """
+            Returns True if the search should stop, with the reason in self.reason
+        """
+        if self.event.is_set():
+            # Set from another process, the reason did not come along with it
+            if self.reason is None:
+                self.reason = CANCELLED
+            return True
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.cancel(DEADLINE)
+        elif self.node_budget is not None and expanded_nodes >= self.node_budget:
+            self.cancel(NODE_BUDGET)
+        elif self.memory_budget is not None and current_memory() > self.memory_budget:
+            self.cancel(MEMORY_BUDGET)
+        return self.event.is_set()
+
+
+def frontier_summary(node):
+    """
+        Plain description of the best node a stopped search had not expanded yet,
+        small enough to send between processes or write out as JSON
+    """
+    if node is None:
+        return None
+    return {
+        "actions": node.get_actions(),
+        "path_cost": node.path_cost,
+        "heuristic_cost": node.heuristic_cost,
+    }
@@ -0,0 +1,215 @@
+"""
+    Purpose: Complete distance table for small boards -> build, mmap, O(depth) solves
+
+    The 3x3 board only has 181,440 reachable states, so one backward breadth-first
+    search from the goal can store the optimal distance of every one of them. Each
+    board is ranked with a Lehmer code into one byte of a 9! byte array. Solving is
+    then a greedy walk down the table: from any state, some neighbor is exactly one
+    move closer to the goal.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+from pattern_db import CACHE_DIR, rank
+from state import get_tile
+
+MAGIC = b"8DST"
+VERSION = 1
+# magic, version, rows, cols, build time in seconds
+HEADER = struct.Struct("<4sHBBd")
+UNREACHABLE = 255
+# Largest board the table is built for, 9! bytes for the 3x3 board
+MAX_CELLS = 9
+
+# Loaded tables, shared by every Puzzle in the process that uses the same file
+_loaded = {}
+
+
+def count_permutations(n):
+    """
+        Number of orderings of n tiles, n!
+    """
+    count = 1
+    for i in range(2, n + 1):
+        count *= i
+    return count
+
+
+def unrank(r, n):
+    """
+        Ordering of n tiles with Lehmer code r, the inverse of rank for a full board
+    """
+    digits = []
+    for base in range(1, n + 1):
+        r, digit = divmod(r, base)
+        digits.append(digit)
+    unused = list(range(n))
+    return [unused.pop(digit) for digit in reversed(digits)]
+
+
+def cache_path(puzzle, cache_dir=CACHE_DIR):
+    """
+        File name for a table, unique per board size and goal
+    """
+    goal = "".join(f"{tile:x}" for tile in puzzle.goal_positions)
+    return os.path.join(
+        cache_dir, f"dist_v{VERSION}_{puzzle.rows}x{puzzle.cols}_{goal}.bin"
+    )
+
+
+def state_rank(puzzle, state):
+    """
+        Lehmer code of a packed state: its index among all orderings of the tiles
+    """
+    return rank([puzzle.get_tile(state, i) for i in range(puzzle.size)], puzzle.size)
+
+
+def python_first_visits(table, states, size, bits, value, unvisited):
+    """
+        Pure Python vectorized.first_visits, for when NumPy is not installed
+        Returns the positions in states of the states marked, in the order seen
+    """
+    new = []
+    for i, state in enumerate(states):
+        r = rank([get_tile(state, j, bits) for j in range(size)], size)
+        if table[r] == unvisited:
+            table[r] = value
+            new.append(i)
+    return new
+
+
+def build(puzzle, path):
+    """
+        Backward breadth-first search from the goal over every reachable state
+        and write the versioned table file
+        File layout: header, goal tiles (one byte per cell), then the n! byte table
+    """
+    if puzzle.size > MAX_CELLS:
+        raise ValueError(f"Distance tables are only built for up to {MAX_CELLS} cells.")
+
+    # NumPy ranks a whole layer at once, without it each child is ranked in Python
+    try:
+        from vectorized import first_visits
+    except ImportError:
+        first_visits = python_first_visits
+
+    start = time.time()
+    table = bytearray([UNREACHABLE]) * count_permutations(puzzle.size)
+    table[state_rank(puzzle, puzzle.goal_packed)] = 0
+    layer = [(puzzle.goal_packed, puzzle.find_blank_tile(puzzle.goal_packed))]
+    distance = 0
+
+    # Expand one whole layer at a time, everything first seen from layer d is d + 1
+    while layer:
+        distance += 1
+        children = []
+        for state, blank in layer:
+            children += puzzle.get_children(state, blank)
+        states = [child for child, _, _ in children]
+        new = first_visits(
+            table, states, puzzle.size, puzzle.bits, distance, UNREACHABLE
+        )
+        layer = [children[i][:2] for i in new]
+    build_time = time.time() - start
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write to a temporary file first so other processes never map a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, puzzle.rows, puzzle.cols, build_time))
+        goal = [puzzle.get_tile(puzzle.goal_packed, i) for i in range(puzzle.size)]
+        f.write(bytes(goal))
+        f.write(table)
+    os.replace(temp_path, path)
+
+
+def load(path):
+    """
+        Memory-map a table file read-only
+        Returns None if the file is missing or was written by another version
+    """
+    if path in _loaded:
+        return _loaded[path]
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, rows, cols, build_time = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        data.close()
+        return None
+
+    offset = HEADER.size + rows * cols
+    table = memoryview(data)[offset:]
+    db = DistanceTable(table, build_time, os.path.getsize(path))
+    _loaded[path] = db
+    return db
+
+
+def load_or_build(puzzle, cache_dir=CACHE_DIR):
+    """
+        Load the table for this puzzle's goal from the cache, building it first
+        if it is not there yet
+    """
+    path = cache_path(puzzle, cache_dir)
+    db = load(path)
+    if db is None:
+        build(puzzle, path)
+        db = load(path)
+    return db
+
+
+class DistanceTable:
+    def __init__(self, table, build_time=0.0, file_size=0):
+        """
+            Optimal distance to the goal for every state, indexed by Lehmer code
+        """
+        self.table = table
+        self.build_time = build_time
+        self.file_size = file_size
+
+    def distance(self, puzzle, state):
+        """
+            Optimal number of moves from the state to the goal, None if unreachable
+        """
+        d = self.table[state_rank(puzzle, state)]
+        return None if d == UNREACHABLE else d
+
+    def ranks_by_depth(self):
+        """
+            Lehmer codes of every reachable state, grouped by distance to the goal
+            Returns {distance: [rank, ...]}, see unrank to turn a rank into a board
+        """
+        by_depth = {}
+        for r, d in enumerate(self.table):
+            if d != UNREACHABLE:
+                by_depth.setdefault(d, []).append(r)
+        return by_depth
+
+    def solve(self, puzzle, state=None):
+        """
+            Walk from the state (initial state by default) to the goal, always
+            stepping to a neighbor one move closer
+            Returns the list of actions, or None if the goal cannot be reached
+        """
+        if state is None:
+            state = puzzle.initial_packed
+        d = self.distance(puzzle, state)
+        if d is None:
+            return None
+
+        blank = puzzle.find_blank_tile(state)
+        actions = []
+        while d > 0:
+            for target, action in puzzle.get_moves(blank):
+                child = puzzle.swap(state, blank, target)
+                if self.table[state_rank(puzzle, child)] == d - 1:
+                    state, blank, d = child, target, d - 1
+                    actions.append(action)
+                    break
+        return actions
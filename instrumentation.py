@@ -0,0 +1,162 @@
+"""
+    Purpose: Optional search instrumentation -> per-phase timers, expansion-rate
+    sampling, observer callbacks, and cProfile/tracemalloc around a single solve
+
+    Pass a SearchInstrumentation to generic_search(instrument=...). When none is passed
+    the search runs exactly as before: the timers work by wrapping the functions the
+    search calls, so nothing is wrapped and nothing is timed.
+"""
+
+import cProfile
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+
+# Phases the search time is split into
+PHASES = ("queue", "children", "heuristic", "nodes")
+
+
+class SearchInstrumentation:
+    def __init__(self, sample_interval=1000, observers=None, profile=None):
+        """
+            sample_interval: expansions between samples of the expansion rate
+            observers: callables taking (event, data), events are "start", "sample"
+            and "finish"
+            profile: None, "cprofile" or "tracemalloc", run around the whole solve
+        """
+        if profile not in (None, "cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown profiler: {profile}")
+        self.sample_interval = sample_interval
+        self.observers = list(observers or [])
+        self.profile = profile
+
+        self.phase_times = defaultdict(float)
+        self.samples = []
+        self.profile_stats = None
+        self.memory_snapshot = None
+        self.peak_memory = None
+
+        self.start_time = None
+        self.last_sample = None
+        self.profiler = None
+        self.started_tracemalloc = False
+
+    def add_observer(self, observer):
+        """
+            Register a callable taking (event, data)
+        """
+        self.observers.append(observer)
+
+    def emit(self, event, data):
+        """
+            Send an event to every observer
+        """
+        for observer in self.observers:
+            observer(event, data)
+
+    def timed(self, phase, function):
+        """
+            Wrap a function so the time spent in it is added to phase
+        """
+        phase_times = self.phase_times
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phase_times[phase] += perf_counter() - start
+
+        return wrapper
+
+    def start(self, puzzle):
+        """
+            Called by the search before the first expansion
+        """
+        if self.profile == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profile == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+        self.start_time = time.perf_counter()
+        self.last_sample = (self.start_time, 0)
+        self.emit("start", {"initial_state": puzzle.initial_state})
+
+    def sample(self, expanded_nodes, frontier_size):
+        """
+            Record the expansion rate since the last sample and the frontier size
+        """
+        now = time.perf_counter()
+        last_time, last_expanded = self.last_sample
+        elapsed = now - last_time
+        rate = (expanded_nodes - last_expanded) / elapsed if elapsed > 0 else 0.0
+        self.last_sample = (now, expanded_nodes)
+
+        data = {
+            "elapsed": now - self.start_time,
+            "expanded_nodes": expanded_nodes,
+            "nodes_per_second": rate,
+            "frontier_size": frontier_size,
+        }
+        self.samples.append(data)
+        self.emit("sample", data)
+
+    def finish(self, metrics):
+        """
+            Called by the search once it is done, adds the instrumentation report to
+            the metrics dict
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profile_stats = pstats.Stats(self.profiler)
+            self.profiler = None
+        elif self.profile == "tracemalloc" and tracemalloc.is_tracing():
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+                self.started_tracemalloc = False
+
+        metrics["instrumentation"] = self.report()
+        self.emit("finish", metrics)
+
+    def report(self):
+        """
+            Summary of the phase times, samples, and memory peak
+        """
+        total = time.perf_counter() - self.start_time
+        phase_times = {phase: self.phase_times[phase] for phase in PHASES}
+        phase_times["other"] = max(0.0, total - sum(phase_times.values()))
+        return {
+            "phase_times": phase_times,
+            "samples": list(self.samples),
+            "peak_memory": self.peak_memory,
+        }
+
+    def print_report(self, limit=10):
+        """
+            Print the phase breakdown, and the top of the profile if one was taken
+        """
+        report = self.report()
+        total = sum(report["phase_times"].values())
+        print("Time per phase:")
+        for phase, seconds in report["phase_times"].items():
+            share = seconds / total * 100 if total > 0 else 0.0
+            print(f"  {phase:<10}{seconds:>10.4f} s {share:>6.1f}%")
+        if self.samples:
+            last = self.samples[-1]
+            print(
+                f"Last sample: {last['nodes_per_second']:,.0f} nodes/s, "
+                f"frontier {last['frontier_size']:,}"
+            )
+        if self.peak_memory is not None:
+            print(f"Peak traced memory: {self.peak_memory:,} bytes")
+        if self.profile_stats is not None:
+            self.profile_stats.sort_stats("cumulative").print_stats(limit)
+        if self.memory_snapshot is not None:
+            for stat in self.memory_snapshot.statistics("lineno")[:limit]:
+                print(f"  {stat}")
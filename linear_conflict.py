@@ -0,0 +1,120 @@
+"""
+    Purpose: Manhattan Distance plus linear conflicts -> conflict tables per line,
+    full lookup and per-move delta
+
+    Two tiles are in linear conflict when both sit in their goal row (or column) but
+    in the wrong order: one of them has to leave the line and come back, which costs
+    2 moves that the Manhattan Distance does not count. For each line the fewest
+    tiles that must leave is the number of goal tiles in the line minus the longest
+    run of them already in increasing goal order, so the heuristic stays admissible.
+
+    The tiles of a line are read as a code, one digit per cell: 0 for a tile that
+    belongs to another line, otherwise its goal position in the line plus 1. Every
+    code of a line length is scored once up front.
+"""
+
+from state import slide
+
+
+def count_conflicts(goals):
+    """
+        Fewest tiles to take out of a line so the rest are in increasing goal order
+        goals is the goal position of each tile in the line that belongs there
+    """
+    # Longest increasing subsequence, small lines so the quadratic version is fine
+    longest = [1] * len(goals)
+    for i in range(len(goals)):
+        for j in range(i):
+            if goals[j] < goals[i] and longest[j] + 1 > longest[i]:
+                longest[i] = longest[j] + 1
+    return len(goals) - max(longest, default=0)
+
+
+def build_conflicts(length):
+    """
+        Conflict count of every code of a line with length cells
+        Returns a list indexed by code
+    """
+    base = length + 1
+    table = []
+    for code in range(base**length):
+        goals = []
+        for _ in range(length):
+            code, digit = divmod(code, base)
+            if digit:
+                goals.append(digit - 1)
+        table.append(count_conflicts(goals))
+    return table
+
+
+class LinearConflict:
+    def __init__(self, puzzle):
+        """
+            Precompute the lines of the board and the code weights of every tile
+            lines holds the board indexes of each row, then each column
+            weights[line][k][tile] is what tile adds to the line's code in cell k
+        """
+        self.puzzle = puzzle
+        self.bits = puzzle.bits
+        rows, cols = puzzle.rows, puzzle.cols
+
+        self.lines = [[r * cols + c for c in range(cols)] for r in range(rows)]
+        self.lines += [[r * cols + c for r in range(rows)] for c in range(cols)]
+        self.row_line = [index // cols for index in range(puzzle.size)]
+        self.col_line = [rows + index % cols for index in range(puzzle.size)]
+
+        self.weights = []
+        for line, cells in enumerate(self.lines):
+            base = len(cells) + 1
+            cell_weights = []
+            for k in range(len(cells)):
+                weight = [0] * puzzle.size
+                for tile in range(1, puzzle.size):
+                    goal = puzzle.goal_positions[tile]
+                    if line < rows and goal // cols == line:
+                        weight[tile] = (goal % cols + 1) * base**k
+                    elif line >= rows and goal % cols == line - rows:
+                        weight[tile] = (goal // cols + 1) * base**k
+                cell_weights.append(weight)
+            self.weights.append(cell_weights)
+
+        row_conflicts = build_conflicts(cols)
+        col_conflicts = row_conflicts if rows == cols else build_conflicts(rows)
+        self.conflicts = [row_conflicts] * rows + [col_conflicts] * cols
+
+    def line_conflicts(self, state, line):
+        """
+            Conflict count of one line of a packed state
+        """
+        mask = (1 << self.bits) - 1
+        code = 0
+        for index, weight in zip(self.lines[line], self.weights[line]):
+            code += weight[(state >> (self.bits * index)) & mask]
+        return self.conflicts[line][code]
+
+    def lookup(self, state):
+        """
+            Manhattan Distance plus 2 moves for every tile that must leave its line
+        """
+        conflicts = 0
+        for line in range(len(self.lines)):
+            conflicts += self.line_conflicts(state, line)
+        return self.puzzle.calculate_manhattan_distance_heuristic(state) + 2 * conflicts
+
+    def delta(self, state, tile, src, dst):
+        """
+            Change in h after tile slides from src to dst
+            A sideways move keeps the order of every row and only changes the two
+            columns the tile left and entered, an up or down move the two rows
+        """
+        if self.row_line[src] == self.row_line[dst]:
+            lines = (self.col_line[src], self.col_line[dst])
+        else:
+            lines = (self.row_line[src], self.row_line[dst])
+        # The state before the move, with the tile back in src
+        before = slide(state, src, dst, self.bits)
+        change = 0
+        for line in lines:
+            change += self.line_conflicts(state, line)
+            change -= self.line_conflicts(before, line)
+        return self.puzzle.manhattan_distance_delta(state, tile, src, dst) + 2 * change
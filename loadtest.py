@@ -0,0 +1,171 @@
+"""
+    Purpose: Load test for the solve service -> latency percentiles and throughput
+    at increasing numbers of concurrent clients
+
+    Start the service first (python service.py), or pass --spawn to have this script
+    start one. Boards are drawn with replacement from a fixed pool of random solvable
+    boards, so at higher concurrency some requests hit a board already being solved.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+from puzzle import Puzzle, make_goal_state
+
+CONCURRENCY = (1, 2, 4, 8, 16, 32, 64)
+
+
+def random_boards(count, seed=0, rows=3, cols=3):
+    """
+        count distinct random solvable boards, as digit strings for 3x3 boards
+    """
+    rng = random.Random(seed)
+    goal_state = make_goal_state(rows, cols)
+    tiles = list(range(rows * cols))
+    boards = set()
+    while len(boards) < count:
+        rng.shuffle(tiles)
+        board = [tiles[r * cols : (r + 1) * cols] for r in range(rows)]
+        if Puzzle(board, goal_state).is_solvable():
+            boards.add("".join(map(str, tiles)))
+    return sorted(boards)
+
+
+def percentile(values, p):
+    """
+        Nearest-rank percentile of a list of numbers
+    """
+    ordered = sorted(values)
+    index = max(0, -(-len(ordered) * p // 100) - 1)
+    return ordered[int(index)]
+
+
+async def request(host, port, unix, body):
+    """
+        Send one POST /solve and return (status, payload)
+    """
+    if unix is not None:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    data = json.dumps(body).encode()
+    writer.write(
+        "POST /solve HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode()
+        + data
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(payload)
+
+
+async def run_level(args, boards, concurrency, rng):
+    """
+        Send args.requests requests with concurrency clients at a time
+        Returns the latencies in seconds and the count of each status
+    """
+    latencies = []
+    statuses = {}
+    queue = [rng.choice(boards) for _ in range(args.requests)]
+
+    async def client():
+        while queue:
+            board = queue.pop()
+            body = {"initial_state": board, "algorithm": args.algorithm}
+            if args.timeout is not None:
+                body["timeout"] = args.timeout
+            start = time.perf_counter()
+            status, _ = await request(args.host, args.port, args.unix, body)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+async def wait_for_server(args, seconds=30):
+    """
+        Wait until the service accepts connections
+    """
+    end = time.time() + seconds
+    while True:
+        try:
+            if args.unix is not None:
+                _, writer = await asyncio.open_unix_connection(args.unix)
+            else:
+                _, writer = await asyncio.open_connection(args.host, args.port)
+            writer.close()
+            return
+        except OSError:
+            if time.time() > end:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def main(args):
+    await wait_for_server(args)
+    boards = random_boards(args.boards, args.seed)
+    rng = random.Random(args.seed)
+
+    print(
+        f"{'Clients':>8}{'Requests':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'Req/s':>10}  Statuses"
+    )
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        latencies, statuses = await run_level(args, boards, concurrency, rng)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{concurrency:>8}{len(latencies):>10}"
+            f"{percentile(latencies, 50) * 1000:>10.1f}"
+            f"{percentile(latencies, 99) * 1000:>10.1f}"
+            f"{len(latencies) / elapsed:>10.0f}  {statuses}"
+        )
+
+
+def parse_args():
+    """
+        Command line options for the load test
+    """
+    parser = argparse.ArgumentParser(description="Load test for service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket")
+    parser.add_argument("--requests", type=int, default=200, help="per level")
+    parser.add_argument("--boards", type=int, default=100, help="distinct boards")
+    parser.add_argument("--algorithm", default="manhattan")
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=list(CONCURRENCY)
+    )
+    parser.add_argument(
+        "--spawn", action="store_true", help="start service.py for the test"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = None
+    if args.spawn:
+        command = [sys.executable, "service.py", "--host", args.host]
+        command += ["--unix", args.unix] if args.unix else ["--port", str(args.port)]
+        server = subprocess.Popen(command)
+    try:
+        asyncio.run(main(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
@@ -14,20 +14,29 @@
     Purpose: Entry point for running the program with user input or default puzzle.
 """
 
-from puzzle import Puzzle
+import argparse
+import sys
+from functools import partial
+
+from batch import ALGORITHMS, add_result, solve_batch
+from bidirectional import bidirectional_search
+from puzzle import Puzzle, make_goal_state
 from search import (
+    TIMEOUT,
     generic_search,
     uniform_cost_search,
     a_star_misplaced,
     a_star_manhattan,
+    a_star_pdb,
+    a_star_linear_conflict,
+    a_star_walking_distance,
+    ida_star,
+    table_search,
 )
-from test.test_cases import test_cases
-from visualization import (
-    plot_metrics,
-    plot_time_vs_depth,
-    plot_nodes_vs_depth,
-    plot_max_queue_vs_depth,
-)
+from solution import encode
+
+# The solve cache, the stream reader, the test cases and the plots are imported
+# where they are used, matplotlib alone takes longer to load than a typical solve
 
 
 def make_puzzle():
@@ -37,62 +46,95 @@ def make_puzzle():
     """
     print("\nEnter your puzzle, using 0 to represent the blank space.")
     print(
-        "Please enter a valid 8-puzzle configuration, delimiting numbers with spaces."
+        "Please enter a valid sliding puzzle configuration (3x3 for the 8-puzzle, "
+        "4x4 for the 15-puzzle), delimiting numbers with spaces."
     )
     print("Press RETURN only after finishing each row.\n")
 
-    puzzle = []
-    for i in range(3):
-        row = list(map(int, input(f"Enter row {i + 1}: ").split()))
-        if len(row) != 3:
-            raise Exception("Each row must contain exactly 3 numbers.")
-        puzzle.append(row)
+    try:
+        size = input("Enter the number of rows (press RETURN for 3): ").strip()
+        rows = int(size) if size else 3
+        # A board needs at least one row and two cells, every row has two or more
+        if rows < 1:
+            raise ValueError("The puzzle must have at least one row.")
+
+        puzzle = []
+        for i in range(rows):
+            row = list(map(int, input(f"Enter row {i + 1}: ").split()))
+            # The first row sets the width, every other row must match it
+            if len(row) < 2:
+                raise ValueError("Each row needs at least 2 numbers.")
+            if puzzle and len(row) != len(puzzle[0]):
+                raise ValueError("Each row must contain the same number of numbers.")
+            puzzle.append(row)
 
-        # Make sure that the puzzle contains numbers 0 to 8 by flatenning the puzzle
+        # Make sure that the puzzle contains numbers 0 to n - 1 by flatenning it
         flattened = [num for row in puzzle for num in row]
-        if sorted(flattened) != list(range(9)):
-            raise Exception(
-                "The puzzle must include all numbers from 0 to 8 with no duplicates."
+        if sorted(flattened) != list(range(len(flattened))):
+            raise ValueError(
+                f"The puzzle must include all numbers from 0 to {len(flattened) - 1} "
+                "with no duplicates."
             )
+    except ValueError as e:
+        print(f"Invalid puzzle: {e}")
+        return None
 
-        return puzzle
+    return puzzle
 
 
-def test():
+def test(workers=0, timeout=TIMEOUT, cache=None):
     """
     Function that runs the test cases and visualizes the results.
+    workers > 0 spreads the test cases over that many processes, 0 runs them here.
+    cache is an optional SolveCache, cached puzzles are not searched again.
     """
+    from test.test_cases import test_cases
+    from visualization import (
+        plot_time_vs_depth,
+        plot_nodes_vs_depth,
+        plot_max_queue_vs_depth,
+    )
+
     algorithms = [
         ("A* Manhattan", a_star_manhattan),
         ("A* Misplaced Tile", a_star_misplaced),
         ("Uniform Cost Search", uniform_cost_search),
+        ("IDA* Manhattan", ida_star),
+        ("A* Pattern Database", a_star_pdb),
+        ("A* Linear Conflict", a_star_linear_conflict),
+        ("A* Walking Distance", a_star_walking_distance),
+        ("Distance Table", table_search),
+        ("Bidirectional UCS", bidirectional_search),
+        (
+            "Bidirectional MM Manhattan",
+            partial(bidirectional_search, heuristic="manhattan"),
+        ),
     ]
 
     results = {
-        "A* Manhattan": {"depths": [], "times": [], "nodes": [], "queue": []},
-        "A* Misplaced Tile": {"depths": [], "times": [], "nodes": [], "queue": []},
-        "Uniform Cost Search": {"depths": [], "times": [], "nodes": [], "queue": []},
+        algo_name: {"depths": [], "times": [], "nodes": [], "queue": []}
+        for algo_name, _ in algorithms
     }
 
-    # Loop through each test case
-    for test_case in test_cases:
-        initial_state = test_case["initial_state"]
-        expected_depth = test_case["depth"]
-        goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
-        puzzle = Puzzle(initial_state, goal_state)
+    goal_state = make_goal_state()
+    puzzles = [Puzzle(case["initial_state"], goal_state) for case in test_cases]
 
-        # Loop through each algorithm
-        for algo_name, algo in algorithms:
-            result, depth_data, metrics = generic_search(puzzle, algo)
+    # Loop through each algorithm, results come back as each test case finishes
+    for algo_name, algo in algorithms:
+        for index, actions, metrics in solve_batch(
+            puzzles, algo, workers, timeout, cache
+        ):
+            expected_depth = test_cases[index]["depth"]
 
-            if result is None:
+            if actions is None:
                 print(f"No solution found for {algo_name} on depth {expected_depth}")
                 continue
 
-            results[algo_name]["depths"].append(expected_depth)
-            results[algo_name]["times"].append(metrics["time"])
-            results[algo_name]["nodes"].append(metrics["expanded_nodes"])
-            results[algo_name]["queue"].append(metrics["max_queue_size"])
+            add_result(results, algo_name, expected_depth, metrics)
+
+    # How much the stronger heuristics save over Manhattan Distance at each depth
+    stronger = ["A* Linear Conflict", "A* Walking Distance"]
+    print_reduction(results, "A* Manhattan", stronger)
 
     # Plot data
     plot_time_vs_depth(results)
@@ -100,6 +142,41 @@ def test():
     plot_max_queue_vs_depth(results)
 
 
+def results_by_depth(results, algo_name):
+    """
+    Function that maps each test case depth to the (nodes, seconds) of one algorithm.
+    """
+    entry = results[algo_name]
+    return {
+        depth: (nodes, seconds)
+        for depth, nodes, seconds in zip(
+            entry["depths"], entry["nodes"], entry["times"]
+        )
+    }
+
+
+def print_reduction(results, baseline, names):
+    """
+    Function that prints how many fewer nodes each algorithm in names expanded than
+    the baseline, and how much less time it took, for every test case depth.
+    """
+    base = results_by_depth(results, baseline)
+    for algo_name in names:
+        runs = results_by_depth(results, algo_name)
+        print(f"\n{algo_name} compared to {baseline}")
+        print(f"{'Depth':>6}{'Nodes':>10}{'Baseline':>10}{'Fewer':>8}{'Faster':>8}")
+        for depth in sorted(runs):
+            if depth not in base:
+                continue
+            nodes, seconds = runs[depth]
+            base_nodes, base_seconds = base[depth]
+            fewer = 1 - nodes / base_nodes if base_nodes else 0.0
+            faster = 1 - seconds / base_seconds if base_seconds else 0.0
+            print(
+                f"{depth:>6}{nodes:>10,}{base_nodes:>10,}{fewer:>8.0%}{faster:>8.0%}"
+            )
+
+
 def main():
     print("Welcome to my 8-Puzzle Solver!")
     print(
@@ -128,26 +205,75 @@ def main():
         print("Invalid input! Please enter '1' or '2'.")
         return
 
-    goal_state = [[1, 2, 3], [4, 5, 6], [7, 8, 0]]
+    # The goal has the same dimensions as the puzzle the user entered
+    goal_state = make_goal_state(len(initial_state), len(initial_state[0]))
     puzzle = Puzzle(initial_state, goal_state)
 
+    # Half of all boards can never reach the goal, no need to search those
+    if not puzzle.is_solvable():
+        print("This puzzle is unsolvable, the goal state cannot be reached from it.")
+        return
+
     print("\nSelect algorithm:")
     print("(1) Uniform Cost Search")
     print("(2) A* with Misplaced Tile Heuristic")
     print("(3) A* with Manhattan Distance Heuristic")
+    print("(4) IDA* with Manhattan Distance Heuristic")
+    print("(5) A* with Pattern Database Heuristic")
+    print("(6) Lookup in the Precomputed Distance Table (3x3 only)")
+    print("(7) Bidirectional Uniform Cost Search")
+    print("(8) Bidirectional MM Search with Manhattan Distance Heuristic")
+    print("(9) A* with Linear Conflict Heuristic")
+    print("(10) A* with Walking Distance Heuristic (up to 4x4)")
 
-    choice = int(input("Please enter your choice: "))
-    if choice == 1:
-        # Use Uniform Cost Search
-        result, depth, ucs_metrics = generic_search(puzzle, uniform_cost_search)
-    elif choice == 2:
-        # Use A* with Misplaced Tile Heuristic
-        result, depth, misplaced_metrics = generic_search(puzzle, a_star_misplaced)
-    elif choice == 3:
-        # Use A* with Manhattan Distance Heuristic
-        result, depth, manhattan_metrics = generic_search(puzzle, a_star_manhattan)
-    else:
-        print("Invalid choice! Please enter 1, 2, or 3.")
+    try:
+        choice = int(input("Please enter your choice: "))
+    except ValueError:
+        print("Invalid input! Please enter a number from 1 to 10.")
+        return
+
+    # The distance table and walking distance tables only exist for small boards
+    try:
+        if choice == 1:
+            # Use Uniform Cost Search
+            result, depth, search_metrics = generic_search(puzzle, uniform_cost_search)
+        elif choice == 2:
+            # Use A* with Misplaced Tile Heuristic
+            result, depth, search_metrics = generic_search(puzzle, a_star_misplaced)
+        elif choice == 3:
+            # Use A* with Manhattan Distance Heuristic
+            result, depth, search_metrics = generic_search(puzzle, a_star_manhattan)
+        elif choice == 4:
+            # Use IDA* with Manhattan Distance Heuristic, memory stays O(depth)
+            result, depth, search_metrics = ida_star(puzzle)
+        elif choice == 5:
+            # Use A* with the additive Pattern Database Heuristic, built on first use
+            result, depth, search_metrics = generic_search(puzzle, a_star_pdb)
+        elif choice == 6:
+            # Walk down the table of every state's distance, built on first use
+            result, depth, search_metrics = table_search(puzzle)
+        elif choice == 7:
+            # Search from both ends and meet in the middle
+            result, depth, search_metrics = bidirectional_search(puzzle)
+        elif choice == 8:
+            # Search from both ends, each side guided by Manhattan distance to its
+            # target
+            result, depth, search_metrics = bidirectional_search(puzzle, "manhattan")
+        elif choice == 9:
+            # Use A* with Manhattan Distance plus 2 moves per linear conflict
+            result, depth, search_metrics = generic_search(
+                puzzle, a_star_linear_conflict
+            )
+        elif choice == 10:
+            # Use A* with the Walking Distance Heuristic, tables are built on first use
+            result, depth, search_metrics = generic_search(
+                puzzle, a_star_walking_distance
+            )
+        else:
+            print("Invalid choice! Please enter a number from 1 to 10.")
+            return
+    except ValueError as e:
+        print(f"Cannot solve this puzzle with that algorithm: {e}")
         return
 
     # Metrics for data visualization
@@ -163,17 +289,19 @@ def main():
     else:
         print("\nGoal state!")
 
-        metrics["solution_depth"] = len(result.get_soln()) - 1
-        metrics["expanded_nodes"] = result.expanded_nodes
-        metrics["max_queue_size"] = result.max_queue_size
+        # The run's counters come from the search, the goal node only holds the path
+        metrics["solution_depth"] = result.path_cost
+        metrics["expanded_nodes"] = search_metrics["expanded_nodes"]
+        metrics["max_queue_size"] = search_metrics["max_queue_size"]
 
         print(f"The solution depth was {metrics['solution_depth']}")
         print(f"Number of nodes expanded: {metrics['expanded_nodes']}")
         print(f"Max queue size: {metrics['max_queue_size']}")
+        print(f"Moves: {encode(result.get_actions())}")
         print("\nSolution Path:")
         for state, action, g, h in result.get_soln():
             print(f"The best state to expand with a g(n) = {g} and h(n) = {h} is...")
-            for row in state:
+            for row in puzzle.to_board(state):
                 print(row)
             print()
 
@@ -185,9 +313,160 @@ def main():
             algo = "A* with Misplaced Tile Heuristic"
         elif choice == 3:
             algo = "A* with Manhattan Distance Heuristic"
+        elif choice == 4:
+            algo = "IDA* with Manhattan Distance Heuristic"
+        elif choice == 5:
+            algo = "A* with Pattern Database Heuristic"
+        elif choice == 6:
+            algo = "Distance Table Lookup"
+        elif choice == 7:
+            algo = "Bidirectional Uniform Cost Search"
+        elif choice == 8:
+            algo = "Bidirectional MM with Manhattan Distance Heuristic"
+        elif choice == 9:
+            algo = "A* with Linear Conflict Heuristic"
+        elif choice == 10:
+            algo = "A* with Walking Distance Heuristic"
 
+        # from visualization import plot_metrics
         # plot_metrics(metrics, algo)
 
 
+def parse_args():
+    """
+    Function that reads the command line options.
+    With no options the program runs interactively.
+    """
+    parser = argparse.ArgumentParser(description="8-Puzzle Solver")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="run the experiments across a pool of worker processes and plot them",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes for --batch and --input "
+        "(default: one per CPU)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=TIMEOUT,
+        help="seconds allowed for each puzzle (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="BOARD",
+        default=None,
+        help="solve this one puzzle, e.g. 072461358, print its JSON result and exit",
+    )
+    parser.add_argument(
+        "--input",
+        metavar="FILE",
+        default=None,
+        help="solve the puzzles in FILE ('-' for stdin), one per line, and write "
+        "one JSON result per line",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        default="-",
+        help="where --input writes its results (default: stdout)",
+    )
+    parser.add_argument(
+        "--algorithm",
+        "--algo",
+        choices=sorted(ALGORITHMS),
+        default="manhattan",
+        help="algorithm used for --state and --input (default: %(default)s), "
+        "table needs 9 cells or fewer and walking a board up to 4x4",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write the moves from --state and --input as one string of U, D, L "
+        "and R",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="FILE",
+        default=None,
+        help="sqlite file of solved puzzles for --state, --batch and --input, "
+        "reused across runs",
+    )
+    return parser.parse_args()
+
+
+def solve_state(args, cache=None):
+    """
+    Function that solves the one puzzle in --state here, without a worker pool, and
+    prints its result as one line of JSON, the same record --input writes.
+    Returns the exit status, 1 if the board is invalid or no solution was found.
+    """
+    from stream import solve_stream, write_records
+
+    records = list(
+        solve_stream(
+            [args.state],
+            ALGORITHMS[args.algorithm],
+            0,
+            args.timeout,
+            cache,
+            args.compact,
+        )
+    )
+    write_records(records, sys.stdout)
+    if records and records[0].get("moves") is not None:
+        return 0
+    return 1
+
+
+def run_stream(args, cache=None):
+    """
+    Function that solves every puzzle in --input and writes the results as JSONL.
+    Files are read and written a line at a time so any number of puzzles fit.
+    """
+    from stream import solve_stream, write_records
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        records = solve_stream(
+            source,
+            ALGORITHMS[args.algorithm],
+            args.workers,
+            args.timeout,
+            cache,
+            args.compact,
+        )
+        count = write_records(records, output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"Wrote {count} results.", file=sys.stderr)
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    cache = None
+    if args.cache is not None:
+        from solve_cache import SolveCache
+
+        cache = SolveCache(path=args.cache)
+    status = 0
+    if args.state is not None:
+        status = solve_state(args, cache)
+    elif args.input is not None:
+        run_stream(args, cache)
+    elif args.batch:
+        test(workers=args.workers, timeout=args.timeout, cache=cache)
+    else:
+        main()
+    if cache is not None:
+        print(f"Solve cache: {cache.stats()}", file=sys.stderr)
+        cache.close()
+    sys.exit(status)
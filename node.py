@@ -2,33 +2,102 @@
     Purpose: Define the Node class for representing search tree nodes
 """
 
+from itertools import count
+
+# Moves of the blank tile, a node stores the index of its move in this tuple
+ACTIONS = ("up", "down", "left", "right")
+MOVES = {action: move for move, action in enumerate(ACTIONS)}
+# The action that undoes each action
+REVERSE_ACTIONS = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
+# Creation order of nodes, the last tie-breaker in the open list
+_counter = count()
+
+
+def pack_moves(moves):
+    """
+        Pack move indexes into an integer, 2 bits per move, the first move lowest
+    """
+    packed = 0
+    for i, move in enumerate(moves):
+        packed |= move << (2 * i)
+    return packed
+
+
+def unpack_moves(packed, length):
+    """
+        Move indexes packed by pack_moves, length is the number of moves
+    """
+    return [(packed >> (2 * i)) & 3 for i in range(length)]
+
 
 class Node:
-    def __init__(self, state, parent=None, action=None, path_cost=0, heuristic_cost=0):
+    # No per-instance __dict__, only these fields are stored
+    __slots__ = (
+        "state",
+        "blank",
+        "parent",
+        "move",
+        "path_cost",
+        "heuristic_cost",
+        "f",
+        "order",
+    )
+
+    def __init__(
+        self, state, parent=None, action=None, path_cost=0, heuristic_cost=0, blank=None
+    ):
         """
             Initiate Node class
+            State is the packed integer board, blank caches the index of the blank tile
+            The action is stored as its index in ACTIONS, f(n) is computed once here
         """
         self.state = state
+        self.blank = blank
         self.parent = parent
-        self.action = action
+        self.move = None if action is None else MOVES[action]
         self.path_cost = path_cost
         self.heuristic_cost = heuristic_cost
-        self.expanded_nodes = 0
-        self.max_queue_size = 0
+        self.f = path_cost + heuristic_cost
+        self.order = next(_counter)
 
-    def update_metrics(self, expanded_nodes, max_queue_size):
+    @property
+    def action(self):
         """
-            Update the metrics for the node
+            The action that led to this node, None for the root
         """
-        self.expanded_nodes = expanded_nodes
-        self.max_queue_size = max_queue_size
+        return None if self.move is None else ACTIONS[self.move]
 
     def total_cost(self):
         """
             Calculate the total cost of the node
         """
-        # f(n) = g(n) + h(n)
-        return self.path_cost + self.heuristic_cost
+        # f(n) = g(n) + h(n), cached when the node is made
+        return self.f
+
+    def get_moves(self):
+        """
+            Move indexes from the root to this node, nothing is stored until asked for
+        """
+        moves = []
+        current = self
+        while current.parent is not None:
+            moves.append(current.move)
+            current = current.parent
+        # A node read back from disk has no parent, it keeps its moves from the root
+        return current.root_moves() + moves[::-1]
+
+    def root_moves(self):
+        """
+            Move indexes from the root to this node when it has no parent
+        """
+        return []
+
+    def get_actions(self):
+        """
+            Actions from the root to this node
+        """
+        return [ACTIONS[move] for move in self.get_moves()]
 
     def get_soln(self):
         """
@@ -55,12 +124,32 @@ class Node:
         """
             Less than operator for Node class
             This is used to compare nodes in the priority queue.
+            Lower f(n) first, then lower h(n) (closer to the goal), then older nodes
         """
-        return self.total_cost() < other.total_cost()
+        if self.f != other.f:
+            return self.f < other.f
+        if self.heuristic_cost != other.heuristic_cost:
+            return self.heuristic_cost < other.heuristic_cost
+        return self.order < other.order
+
+
+class SpilledNode(Node):
+    # The moves from the root stand in for the chain of parents
+    __slots__ = ("prefix",)
 
-    def __eq__(self, other):
+    def __init__(self, state, path_cost, heuristic_cost, blank, prefix, order):
         """
-            Equality operator for Node class
-            This is used to compare nodes in the priority queue.
+            Node read back from a spill file, see SpillingOpenList
+            prefix holds its path_cost moves from the root packed by pack_moves,
+            order is kept from the node that was spilled so ties break the same way
         """
-        return self.total_cost() == other.total_cost()
+        super().__init__(
+            state, path_cost=path_cost, heuristic_cost=heuristic_cost, blank=blank
+        )
+        self.prefix = prefix
+        self.order = order
+        if path_cost:
+            self.move = (prefix >> (2 * (path_cost - 1))) & 3
+
+    def root_moves(self):
+        return unpack_moves(self.prefix, self.path_cost)
@@ -0,0 +1,290 @@
+"""
+    Purpose: Define the open lists (frontiers) the search algorithms push nodes into
+    Each one has the same put/get/empty/qsize interface as queue.PriorityQueue,
+    without the thread lock that PriorityQueue takes on every call
+"""
+
+import heapq
+import struct
+import sys
+from collections import deque
+
+from node import SpilledNode, pack_moves
+
+# Bytes of one heap slot, a pointer to the (priority, node) pair
+SLOT_BYTES = struct.calcsize("P")
+
+# Spill record: priority, g, h, order, blank, length of the state in bytes
+# followed by the state and the moves from the root, 2 bits per move
+RECORD = struct.Struct("<dHHQBB")
+
+
+class HeapOpenList:
+    def __init__(self):
+        """
+            Binary heap open list ordered by (priority, node)
+        """
+        self.heap = []
+
+    def put(self, item):
+        """
+            Push a (priority, node) pair onto the heap
+        """
+        heapq.heappush(self.heap, item)
+
+    def get(self):
+        """
+            Pop the (priority, node) pair with the lowest priority
+        """
+        return heapq.heappop(self.heap)
+
+    def empty(self):
+        return not self.heap
+
+    def qsize(self):
+        return len(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class BucketOpenList:
+    def __init__(self, lifo=True):
+        """
+            Bucket queue open list indexed by integer priority f = g + h
+            Inside each f bucket nodes are split by h so the lowest h comes out first,
+            ties on (f, h) are broken LIFO (newest first) or FIFO (oldest first)
+        """
+        # buckets[f][h] holds the nodes queued with priority f and heuristic h
+        self.buckets = []
+        self.lifo = lifo
+        self.min_f = 0
+        self.count = 0
+
+    def put(self, item):
+        """
+            Push a (priority, node) pair, the priority must be a non-negative int
+        """
+        f, node = item
+        h = node.heuristic_cost
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+        bucket = self.buckets[f]
+        while len(bucket) <= h:
+            bucket.append(deque())
+        bucket[h].append(node)
+
+        if self.count == 0 or f < self.min_f:
+            self.min_f = f
+        self.count += 1
+
+    def get(self):
+        """
+            Pop a (priority, node) pair from the lowest non-empty bucket
+        """
+        while True:
+            for entries in self.buckets[self.min_f]:
+                if entries:
+                    self.count -= 1
+                    node = entries.pop() if self.lifo else entries.popleft()
+                    return self.min_f, node
+            # Bucket exhausted, move on to the next priority
+            self.min_f += 1
+
+    def empty(self):
+        return self.count == 0
+
+    def qsize(self):
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+
+def entry_key(item):
+    """
+        Sort key of a (priority, node) pair, the order the heap compares them in
+    """
+    priority, node = item
+    return priority, node.f, node.heuristic_cost, node.order
+
+
+def entry_bytes(item):
+    """
+        Bytes one queued (priority, node) pair keeps alive, measured with
+        sys.getsizeof: the pair, the priority, the node, its state and its heap
+        slot. Parents shared with other nodes are not counted
+    """
+    priority, node = item
+    sizes = map(sys.getsizeof, (item, priority, node, node.state))
+    return sum(sizes) + SLOT_BYTES
+
+
+class SpillRun:
+    def __init__(self, file, offset, count):
+        """
+            Sorted run of spilled nodes starting at offset in the spill file, read
+            back in order
+            head is the next (key, node) to come out, None once the run is used up
+        """
+        self.file = file
+        self.offset = offset
+        self.count = count
+        self.head = None
+        self.advance()
+
+    def advance(self):
+        """
+            Read the next record into head
+            Every run shares the file, so each read starts with a seek to this run
+        """
+        if self.count == 0:
+            self.head = None
+            return
+        self.count -= 1
+        self.file.seek(self.offset)
+        priority, g, h, order, blank, state_length = RECORD.unpack(
+            self.file.read(RECORD.size)
+        )
+        state = int.from_bytes(self.file.read(state_length), "little")
+        prefix = int.from_bytes(self.file.read((2 * g + 7) // 8), "little")
+        self.offset = self.file.tell()
+        node = SpilledNode(state, g, h, blank, prefix, order)
+        self.head = (entry_key((priority, node)), node)
+
+
+class SpillingOpenList:
+    def __init__(self, memory_budget=64 * 2**20, spill_dir=None):
+        """
+            Binary heap open list that keeps at most memory_budget bytes of nodes
+            in memory and spills the rest to sorted runs in a temporary file in
+            spill_dir (the system temporary directory by default)
+            When the heap goes over budget its worse half is appended to the file as
+            one run, each node as its state, g, h and packed moves from the root
+            instead of a parent pointer. get merges the runs back in by priority,
+            so nodes come out in the same order as from HeapOpenList. All runs share
+            one file, so only one file is open however often the heap spills.
+            The node count that fits the budget is set from the size of the first
+            node pushed, see entry_bytes, and the resident peak in bytes is counted
+            at that same size per node
+        """
+        self.heap = []
+        self.memory_budget = memory_budget
+        self.capacity = None
+        self.node_bytes = None
+        self.spill_dir = spill_dir
+        self.file = None
+        # Runs by their head key, the run number breaks ties without comparing runs
+        self.runs = []
+        self.run_count = 0
+        self.count = 0
+
+        self.peak_resident = 0
+        self.spilled_nodes = 0
+        self.spilled_bytes = 0
+
+    def put(self, item):
+        """
+            Push a (priority, node) pair, spilling the worse half first if the heap
+            is full
+        """
+        if self.capacity is None:
+            self.node_bytes = entry_bytes(item)
+            self.capacity = max(2, self.memory_budget // self.node_bytes)
+        # Spill before pushing so the heap never holds more than capacity nodes
+        if len(self.heap) >= self.capacity:
+            self.spill()
+        heapq.heappush(self.heap, item)
+        self.count += 1
+        if len(self.heap) > self.peak_resident:
+            self.peak_resident = len(self.heap)
+
+    def spill(self):
+        """
+            Append the worse half of the heap to the spill file as a new sorted run
+            A sorted list is a valid heap, so the better half needs no heapify
+        """
+        self.heap.sort()
+        keep = len(self.heap) // 2
+        spilled = self.heap[keep:]
+        del self.heap[keep:]
+
+        if self.file is None:
+            # Only searches that spill need it, and it is slow to import
+            import tempfile
+
+            self.file = tempfile.TemporaryFile(dir=self.spill_dir)
+        file = self.file
+        offset = file.seek(0, 2)
+        for priority, node in spilled:
+            state = node.state.to_bytes((node.state.bit_length() + 7) // 8, "little")
+            prefix = pack_moves(node.get_moves())
+            record = RECORD.pack(
+                priority,
+                node.path_cost,
+                node.heuristic_cost,
+                node.order,
+                node.blank,
+                len(state),
+            )
+            record += state + prefix.to_bytes((2 * node.path_cost + 7) // 8, "little")
+            file.write(record)
+            self.spilled_bytes += len(record)
+
+        self.spilled_nodes += len(spilled)
+        run = SpillRun(file, offset, len(spilled))
+        self.run_count += 1
+        heapq.heappush(self.runs, (run.head[0], self.run_count, run))
+
+    def get(self):
+        """
+            Pop the (priority, node) pair with the lowest priority, from memory or
+            from the front of a run file
+        """
+        self.count -= 1
+        if self.runs:
+            key, number, run = self.runs[0]
+            if not self.heap or key < entry_key(self.heap[0]):
+                node = run.head[1]
+                run.advance()
+                if run.head is None:
+                    heapq.heappop(self.runs)
+                    if not self.runs:
+                        # Every run is used up, the next spill starts a new file
+                        self.file.close()
+                        self.file = None
+                else:
+                    heapq.heapreplace(self.runs, (run.head[0], number, run))
+                return key[0], node
+        return heapq.heappop(self.heap)
+
+    def empty(self):
+        return self.count == 0
+
+    def qsize(self):
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """
+            Close the spill file, removing it, once the search is done with the list
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.runs = []
+
+    def spill_metrics(self):
+        """
+            Memory figures for the search metrics
+            peak_resident_nodes is the most nodes held in memory at once and
+            peak_resident_bytes the same peak in bytes, comparable to memory_budget
+        """
+        return {
+            "peak_resident_nodes": self.peak_resident,
+            "peak_resident_bytes": self.peak_resident * (self.node_bytes or 0),
+            "spilled_nodes": self.spilled_nodes,
+            "spilled_bytes": self.spilled_bytes,
+        }
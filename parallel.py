@@ -0,0 +1,327 @@
+"""
+    Purpose: Parallel A* across worker processes -> hash-distributed A* (HDA*)
+
+    Every state has an owner, picked by hashing the packed state. Each worker keeps
+    the open list and best g(n) of the states it owns. Children are scored by the
+    worker that generated them and sent to their owners in batches over one
+    multiprocessing queue per worker. Nodes carry their moves from the root packed
+    2 bits per move, so no worker needs another worker's parents to rebuild a path.
+
+    Workers keep expanding after the first goal is found, pruning every node whose
+    f(n) is not below the best solution cost, until none of them has work left and
+    no batch is in flight. With a consistent heuristic that solution is optimal.
+    The parent process detects this with two rounds of reading the idle flags and
+    the batches sent and received by every worker, and stops only when both rounds
+    find everyone idle and the same, matching counts.
+"""
+
+import heapq
+import os
+import queue
+import time
+from collections import defaultdict
+
+from cancellation import CancellationToken
+from node import ACTIONS, MOVES, unpack_moves
+from puzzle import Puzzle
+from search import TIMEOUT, build_solution, stop_metrics, unsolvable_result
+
+# Children buffered for a worker before they are sent as one batch
+BATCH_SIZE = 256
+# Expansions between flushes of every buffer, so other workers do not starve
+FLUSH_INTERVAL = 128
+# Seconds the parent waits between two reads of the workers' counters
+POLL_INTERVAL = 0.002
+# Seconds an idle worker waits on its queue before checking whether to stop
+IDLE_WAIT = 0.005
+# Seconds the parent waits for a worker's results before checking it is alive
+RESULT_WAIT = 0.1
+
+# Fibonacci hashing, packed states differ mostly in their low bits
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+HASH_MASK = (1 << 64) - 1
+# Larger than any solution cost
+NO_SOLUTION = 2**31 - 1
+
+
+def owner(state, workers):
+    """
+        Worker that owns a packed state
+    """
+    return (((state * HASH_MULTIPLIER) & HASH_MASK) >> 32) % workers
+
+
+def hda_worker(index, initial_state, goal_state, heuristic, root, shared):
+    """
+        One HDA* worker, run in its own process
+        root is the (g, h, state, blank, path) entry of the initial state for the
+        worker that owns it, None for the others
+        Puts (index, solution, stats) on the results queue when told to stop,
+        solution is (cost, packed moves) or None
+        The stop event takes a lock to read, so it is only checked when idle and
+        every FLUSH_INTERVAL expansions
+    """
+    inboxes, results, stop, incumbent, lock, idle, sent, received, expanded = shared
+    workers = len(inboxes)
+    # A stopped worker must not wait to flush batches nobody will read
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+    puzzle = Puzzle(initial_state, goal_state)
+    _, delta = puzzle.get_heuristic(heuristic)
+    inbox = inboxes[index]
+
+    open_list = []
+    best_g = {}
+    buffers = [[] for _ in range(workers)]
+    depth = defaultdict(int)
+    solution = None
+    bound = NO_SOLUTION
+    order = 0
+    expanded_nodes = 0
+    duplicates_pruned = 0
+    max_queue_size = 0
+    since_flush = 0
+
+    def push(g, h, state, blank, path):
+        nonlocal order, duplicates_pruned
+        if g + h >= bound or best_g.get(state, g + 1) <= g:
+            duplicates_pruned += 1
+            return
+        best_g[state] = g
+        order += 1
+        heapq.heappush(open_list, (g + h, h, order, g, state, blank, path))
+
+    def send(target):
+        # Counted before it is sent, so received never gets ahead of sent
+        sent[index] += 1
+        inboxes[target].put(buffers[target])
+        buffers[target] = []
+
+    def flush():
+        for target in range(workers):
+            if buffers[target]:
+                send(target)
+
+    if root is not None:
+        push(*root)
+
+    stopping = False
+    while not stopping:
+        # Take in every batch that has arrived, waiting for one only when idle
+        while True:
+            try:
+                if open_list:
+                    batch = inbox.get_nowait()
+                else:
+                    batch = inbox.get(timeout=IDLE_WAIT)
+            except queue.Empty:
+                break
+            idle[index] = 0
+            received[index] += 1
+            bound = min(bound, incumbent.value)
+            for entry in batch:
+                push(*entry)
+
+        if not open_list:
+            flush()
+            idle[index] = 1
+            stopping = stop.is_set()
+            continue
+        idle[index] = 0
+
+        f, h, _, g, state, blank, path = heapq.heappop(open_list)
+        if f >= bound:
+            # Every node left is at least as long as the best solution
+            duplicates_pruned += len(open_list) + 1
+            open_list.clear()
+            continue
+        if g > best_g[state]:
+            duplicates_pruned += 1
+            continue
+
+        expanded_nodes += 1
+        expanded[index] = expanded_nodes
+        depth[g] += 1
+        if len(open_list) > max_queue_size:
+            max_queue_size = len(open_list)
+
+        if puzzle.goal_test(state):
+            with lock:
+                if g < incumbent.value:
+                    incumbent.value = g
+                    solution = (g, path)
+            bound = min(bound, incumbent.value)
+            continue
+
+        for child, child_blank, action in puzzle.get_children(state, blank):
+            tile = puzzle.get_tile(state, child_blank)
+            child_h = h + delta(child, tile, child_blank, blank)
+            child_path = path | MOVES[action] << (2 * g)
+            entry = (g + 1, child_h, child, child_blank, child_path)
+            target = owner(child, workers)
+            if target == index:
+                push(*entry)
+            else:
+                buffers[target].append(entry)
+                if len(buffers[target]) >= BATCH_SIZE:
+                    send(target)
+
+        since_flush += 1
+        if since_flush >= FLUSH_INTERVAL:
+            since_flush = 0
+            flush()
+            bound = min(bound, incumbent.value)
+            stopping = stop.is_set()
+
+    stats = {
+        "expanded_nodes": expanded_nodes,
+        "duplicates_pruned": duplicates_pruned,
+        "max_queue_size": max_queue_size,
+        "depth": dict(depth),
+    }
+    results.put((index, solution, stats))
+
+
+def check_workers(processes, stop, reported=()):
+    """
+        Raise RuntimeError if a worker not in reported has exited, after stopping
+        and terminating the others
+    """
+    for index, process in enumerate(processes):
+        if process.exitcode is None or index in reported:
+            continue
+        stop.set()
+        for other in processes:
+            if other.exitcode is None:
+                other.terminate()
+            other.join()
+        raise RuntimeError(
+            f"HDA* worker {index} exited with code {process.exitcode} without "
+            "reporting its results"
+        )
+
+
+def hda_star(puzzle, heuristic="manhattan", workers=None, timeout=TIMEOUT, cancel=None):
+    """
+        Hash-distributed A* over workers processes, one per CPU by default
+        heuristic must be admissible for the path to be optimal, states reached
+        again with a lower g(n) are opened again
+        cancel is an optional CancellationToken, see generic_search, it is checked
+        by this process, which tells the workers to stop
+        Returns the solution node, depth, and metrics like generic_search, plus
+        "workers" and "worker_expansions" (nodes expanded by each worker)
+        Raises RuntimeError if a worker exits without reporting, e.g. when it is
+        killed, the other workers are stopped first
+    """
+    start = time.time()
+    if not puzzle.is_solvable():
+        return unsolvable_result(start)
+    if cancel is None:
+        cancel = CancellationToken(timeout)
+    workers = workers or os.cpu_count() or 1
+
+    # Build any table the heuristic needs once here, the workers load it
+    full, _ = puzzle.get_heuristic(heuristic)
+    state = puzzle.initial_packed
+    root = (0, full(state), state, puzzle.find_blank_tile(state), 0)
+    root_owner = owner(state, workers)
+
+    # Imported here so loading the algorithm registry stays fast
+    import multiprocessing
+
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    stop = context.Event()
+    lock = context.Lock()
+    incumbent = context.RawValue("l", NO_SOLUTION)
+    idle = context.RawArray("b", workers)
+    sent = context.RawArray("q", workers)
+    received = context.RawArray("q", workers)
+    expanded = context.RawArray("q", workers)
+    shared = (inboxes, results, stop, incumbent, lock, idle, sent, received, expanded)
+
+    processes = [
+        context.Process(
+            target=hda_worker,
+            args=(
+                index,
+                puzzle.initial_state,
+                puzzle.goal_state,
+                heuristic,
+                root if index == root_owner else None,
+                shared,
+            ),
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # Stop once two reads in a row find every worker idle and no batch in flight
+    previous = None
+    stopped = False
+    while True:
+        # Workers only exit once told to stop, so one that is gone has failed
+        check_workers(processes, stop)
+        if cancel.check(sum(expanded)):
+            stopped = True
+            break
+        snapshot = (all(idle), sum(sent), sum(received))
+        if snapshot[0] and snapshot[1] == snapshot[2] and snapshot == previous:
+            break
+        previous = snapshot
+        time.sleep(POLL_INTERVAL)
+    stop.set()
+
+    finished = {}
+    while len(finished) < workers:
+        try:
+            index, found, stats = results.get(timeout=RESULT_WAIT)
+        except queue.Empty:
+            # Results are flushed before a worker exits, so an exited worker
+            # that is still missing here never sent them
+            check_workers(processes, stop, finished)
+            continue
+        finished[index] = (index, found, stats)
+    for process in processes:
+        process.join()
+
+    solution = None
+    depth = defaultdict(int)
+    worker_expansions = [0] * workers
+    duplicates_pruned = max_queue_size = 0
+    for index, found, stats in finished.values():
+        if found is not None and (solution is None or found[0] < solution[0]):
+            solution = found
+        worker_expansions[index] = stats["expanded_nodes"]
+        duplicates_pruned += stats["duplicates_pruned"]
+        # Sum of each worker's own peak, the open lists never all peak together
+        max_queue_size += stats["max_queue_size"]
+        for g, count in stats["depth"].items():
+            depth[g] += count
+
+    result = None
+    if solution is not None:
+        cost, path = solution
+        actions = [ACTIONS[move] for move in unpack_moves(path, cost)]
+        result = build_solution(puzzle, actions, heuristic)
+
+    metrics = {
+        "expanded_nodes": sum(worker_expansions),
+        "max_queue_size": max_queue_size,
+        "duplicates_pruned": duplicates_pruned,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": False,
+        "bound": 1.0,
+        "workers": workers,
+        "worker_expansions": worker_expansions,
+        "batches": sum(sent),
+    }
+    if stopped:
+        # A solution found before the stop is not proven optimal
+        stop_metrics(metrics, cancel)
+        metrics["bound"] = None
+    return result, depth, metrics
@@ -0,0 +1,251 @@
+"""
+    Purpose: Additive pattern database heuristic -> build, save, memory-map, lookup
+
+    The tiles are split into disjoint groups. For each group a backward breadth-first
+    search from the goal finds, for every placement of the group's tiles, the fewest
+    moves of those tiles needed to reach the goal. Moves of other tiles are free, so
+    the values of the groups can be added together and stay admissible.
+"""
+
+import mmap
+import os
+import struct
+import time
+from collections import deque
+
+from state import get_tile, tile_bits
+
+MAGIC = b"8PDB"
+VERSION = 1
+# magic, version, rows, cols, number of groups, build time in seconds
+HEADER = struct.Struct("<4sHBBBd")
+UNSEEN = 255
+# Next to this file, so runs from any working directory share the built files
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# Loaded databases, shared by every Puzzle in the process that uses the same file
+_loaded = {}
+
+
+def default_groups(size, group_size=4):
+    """
+        Split tiles 1 to size - 1 into consecutive groups of group_size tiles
+    """
+    tiles = list(range(1, size))
+    return [tuple(tiles[i : i + group_size]) for i in range(0, len(tiles), group_size)]
+
+
+def count_placements(n, k):
+    """
+        Number of ways to place k distinct tiles on n cells, n! / (n - k)!
+    """
+    count = 1
+    for i in range(k):
+        count *= n - i
+    return count
+
+
+def rank(positions, n):
+    """
+        Perfect hash of a placement of distinct tiles on n cells
+        Returns an index in 0 to count_placements(n, len(positions)) - 1
+    """
+    r = 0
+    for i, p in enumerate(positions):
+        smaller = 0
+        for q in positions[:i]:
+            if q < p:
+                smaller += 1
+        r = r * (n - i) + p - smaller
+    return r
+
+
+def build_group(puzzle, group):
+    """
+        Backward breadth-first search from the goal over placements of one group
+        An abstract state is the positions of the group's tiles plus the blank.
+        Sliding a group tile costs 1 and sliding any other tile costs 0, so this is
+        a 0-1 breadth-first search. Returns the table as a bytearray.
+    """
+    n = puzzle.size
+    k = len(group)
+    goal = [puzzle.goal_positions[tile] for tile in group]
+    goal.append(puzzle.goal_positions[0])
+
+    table = bytearray([UNSEEN]) * count_placements(n, k)
+    dist = bytearray([UNSEEN]) * count_placements(n, k + 1)
+    dist[rank(goal, n)] = 0
+    frontier = deque([(tuple(goal), 0)])
+
+    while frontier:
+        positions, d = frontier.popleft()
+        if d > dist[rank(positions, n)]:
+            continue
+
+        # Every placement of the group is settled the first time it comes out
+        r = rank(positions[:k], n)
+        if d < table[r]:
+            table[r] = d
+
+        blank = positions[k]
+        for target, _ in puzzle.get_moves(blank):
+            moved = list(positions)
+            cost = 0
+            if target in positions[:k]:
+                moved[positions.index(target)] = blank
+                cost = 1
+            moved[k] = target
+
+            child_rank = rank(moved, n)
+            if d + cost < dist[child_rank]:
+                dist[child_rank] = d + cost
+                if cost:
+                    frontier.append((tuple(moved), d + cost))
+                else:
+                    frontier.appendleft((tuple(moved), d))
+    return table
+
+
+def cache_path(puzzle, groups, cache_dir=CACHE_DIR):
+    """
+        File name for a database, unique per board size, goal, and tile groups
+    """
+    goal = "".join(f"{tile:x}" for tile in puzzle.goal_positions)
+    pattern = "-".join(".".join(str(tile) for tile in group) for group in groups)
+    return os.path.join(
+        cache_dir, f"pdb_v{VERSION}_{puzzle.rows}x{puzzle.cols}_{goal}_{pattern}.bin"
+    )
+
+
+def build(puzzle, groups, path):
+    """
+        Build every group's table and write the versioned database file
+        File layout: header, goal tiles (one byte per cell), then for each group its
+        tile count and tiles, then the group tables back to back
+    """
+    start = time.time()
+    tables = [build_group(puzzle, group) for group in groups]
+    build_time = time.time() - start
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write to a temporary file first so other processes never map a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC, VERSION, puzzle.rows, puzzle.cols, len(groups), build_time
+            )
+        )
+        goal = [puzzle.get_tile(puzzle.goal_packed, i) for i in range(puzzle.size)]
+        f.write(bytes(goal))
+        for group in groups:
+            f.write(bytes([len(group)]) + bytes(group))
+        for table in tables:
+            f.write(table)
+    os.replace(temp_path, path)
+
+
+def load(path):
+    """
+        Memory-map a database file read-only
+        Returns None if the file is missing or was written by another version
+    """
+    if path in _loaded:
+        return _loaded[path]
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, rows, cols, num_groups, build_time = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        data.close()
+        return None
+
+    size = rows * cols
+    offset = HEADER.size + size
+    groups = []
+    for _ in range(num_groups):
+        k = data[offset]
+        groups.append(tuple(data[offset + 1 : offset + 1 + k]))
+        offset += 1 + k
+
+    view = memoryview(data)
+    tables = []
+    for group in groups:
+        length = count_placements(size, len(group))
+        tables.append(view[offset : offset + length])
+        offset += length
+
+    db = PatternDatabase(size, groups, tables, build_time, os.path.getsize(path))
+    _loaded[path] = db
+    return db
+
+
+def load_or_build(puzzle, groups=None, cache_dir=CACHE_DIR):
+    """
+        Load the database for this puzzle's goal from the cache, building it first
+        if it is not there yet
+    """
+    if groups is None:
+        groups = default_groups(puzzle.size)
+    path = cache_path(puzzle, groups, cache_dir)
+    db = load(path)
+    if db is None:
+        build(puzzle, groups, path)
+        db = load(path)
+    return db
+
+
+class PatternDatabase:
+    def __init__(self, size, groups, tables, build_time=0.0, file_size=0):
+        """
+            Disjoint additive pattern database over memory-mapped group tables
+        """
+        self.size = size
+        self.bits = tile_bits(size)
+        self.groups = groups
+        self.tables = tables
+        self.build_time = build_time
+        self.file_size = file_size
+
+        # Which group each tile belongs to, the blank belongs to none
+        self.tile_group = [None] * size
+        for g, group in enumerate(groups):
+            for tile in group:
+                self.tile_group[tile] = g
+
+    def find_positions(self, state):
+        """
+            Board index of every tile in the state, indexed by tile
+        """
+        where = [0] * self.size
+        for index in range(self.size):
+            where[get_tile(state, index, self.bits)] = index
+        return where
+
+    def lookup(self, state):
+        """
+            Sum of the group table values for the state
+        """
+        where = self.find_positions(state)
+        h = 0
+        for group, table in zip(self.groups, self.tables):
+            h += table[rank([where[tile] for tile in group], self.size)]
+        return h
+
+    def delta(self, state, tile, src, dst):
+        """
+            Change in h after tile slides from src to dst
+            Only the group holding the tile that moved is looked up again
+        """
+        g = self.tile_group[tile]
+        if g is None:
+            return 0
+        group = self.groups[g]
+        table = self.tables[g]
+        where = self.find_positions(state)
+        after = [where[t] for t in group]
+        before = [src if t == tile else where[t] for t in group]
+        return table[rank(after, self.size)] - table[rank(before, self.size)]
@@ -2,61 +2,127 @@
     Purpose: Define the puzzle logic -> state representation, moves, goal test
 """
 
+import distance_table
+import pattern_db
+from linear_conflict import LinearConflict
+from state import find_blank, get_tile, pack, slide, tile_bits, unpack
+from walking_distance import WalkingDistance
+
+
+def make_goal_state(rows=3, cols=3):
+    """
+        Build the standard goal board: tiles in order with the blank in the last cell
+    """
+    tiles = list(range(1, rows * cols)) + [0]
+    return [tiles[row * cols : (row + 1) * cols] for row in range(rows)]
+
 
 class Puzzle:
     def __init__(self, initial_state, goal_state):
         """ 
-            Initialize the puzzle with the initial and goal states 
+            Initialize the puzzle with the initial and goal states
             Initial state is the state the user inputs
             Goal state is the state we want to reach
+            Both are also kept packed into integers, which is what the search works on
+            The board size is taken from the goal state, so any N x M board works
         """
         self.initial_state = initial_state
         self.goal_state = goal_state
+        if not goal_state or not goal_state[0]:
+            raise ValueError("The board needs at least one row and one column.")
+        self.rows = len(goal_state)
+        self.cols = len(goal_state[0])
+        self.size = self.rows * self.cols
+        if len(initial_state) != self.rows or any(
+            len(row) != self.cols for row in initial_state
+        ):
+            raise ValueError(
+                f"The initial state must be {self.rows}x{self.cols}, like the goal."
+            )
+        self.bits = tile_bits(self.size)
+        self.initial_packed = pack(initial_state, self.bits)
+        self.goal_packed = pack(goal_state, self.bits)
+        self.pattern_db = None
+        self.distance_table = None
+        self.batch_heuristics = None
+        self.linear_conflict = None
+        self.walking_distance = None
+
+        # Precomputed neighbor table: the legal (target, action) moves for every
+        # blank position, so moves are never bounds-checked during the search
+        self.neighbors = [self.find_moves(blank) for blank in range(self.size)]
+
+        # Precomputed goal tables, indexed [tile][board index]
+        # manhattan_table holds each tile's distance from its goal cell and
+        # misplaced_table holds 1 if the tile is out of place, the blank row is all 0
+        self.goal_positions = [0] * self.size
+        for index in range(self.size):
+            self.goal_positions[self.get_tile(self.goal_packed, index)] = index
+        self.manhattan_table = [[0] * self.size for _ in range(self.size)]
+        self.misplaced_table = [[0] * self.size for _ in range(self.size)]
+        for tile in range(1, self.size):
+            goal_row, goal_col = divmod(self.goal_positions[tile], self.cols)
+            for index in range(self.size):
+                row, col = divmod(index, self.cols)
+                distance = abs(row - goal_row) + abs(col - goal_col)
+                self.manhattan_table[tile][index] = distance
+                self.misplaced_table[tile][index] = int(distance != 0)
+
+    def to_board(self, state):
+        """
+            Convert a packed state back into rows of tiles
+            This is used to print the solution path in the main function
+        """
+        return unpack(state, self.rows, self.cols, self.bits)
+
+    def get_tile(self, state, index):
+        """
+            Read the tile at a flat board index of a packed state
+        """
+        return get_tile(state, index, self.bits)
 
     def goal_test(self, state):
         """
             Check if the current state is the goal state
         """
-        return state == self.goal_state
+        return state == self.goal_packed
 
     def find_blank_tile(self, state):
         """ 
-            Find the position of the blank tile in the state 
+            Find the position of the blank tile in the state
             This is used to find the blank tile to move
         """
-        for i in range(len(state)):
-            for j in range(len(state[i])):
-                if state[i][j] == 0:
-                    return i, j
+        return find_blank(state, self.size, self.bits)
 
     def is_valid(self, row, col):
         """ 
             Check if the move is valid
-            This is used to check if the move is within the 3x3 grid
+            This is used to check if the move is within the grid
         """
-        # We have to make sure that the move is within the 3x3 grid, no out of bound moves
-        return 0 <= row < 3 and 0 <= col < 3
+        # We have to make sure that the move is within the grid, no out of bound moves
+        return 0 <= row < self.rows and 0 <= col < self.cols
 
-    def swap(self, state, row, col, new_row, new_col):
+    def swap(self, state, blank, target):
         """ 
             Swap the blank tile with the target position
             This is used to generate the successor states
         """
-        # Make a copy to prevent modifying original states since lists are mutable
-        temp = [row[:] for row in state]
-        # Make the swap
-        temp[row][col], temp[new_row][new_col] = (
-            temp[new_row][new_col],
-            temp[row][col],
-        )
-        return temp
+        # Integers are immutable so there is no copy to make, the swap is a bit shift
+        return slide(state, blank, target, self.bits)
 
-    def get_children(self, state):
+    def get_moves(self, blank):
         """ 
-            Generate all possible successor states from the current state
-            This is used to generate the successor states for the search algorithms
+            Look up every legal move for the blank tile in the neighbor table
+            Returns (target index, action) for each cell the blank can slide into
+        """
+        return self.neighbors[blank]
+
+    def find_moves(self, blank):
+        """ 
+            Find every legal move for the blank tile
+            This is used to fill in the neighbor table
         """
-        row, col = self.find_blank_tile(state)
+        row, col = divmod(blank, self.cols)
 
         valid_moves = {
             "up": (row - 1, col),
@@ -65,27 +131,40 @@ class Puzzle:
             "right": (row, col + 1),
         }
 
-        children = []
-
+        moves = []
         for action, (new_row, new_col) in valid_moves.items():
             if self.is_valid(new_row, new_col):
-                # Make new state by swapping the blank with the target position
-                temp = self.swap(state, row, col, new_row, new_col)
-                children.append(
-                    (temp, action)
-                )  # If the move is valid, add the new state and action to the successors
+                moves.append((new_row * self.cols + new_col, action))
+        return moves
+
+    def get_children(self, state, blank=None):
+        """ 
+            Generate all possible successor states from the current state
+            This is used to generate the successor states for the search algorithms
+            Returns (state, blank index, action) for each child
+        """
+        if blank is None:
+            blank = self.find_blank_tile(state)
+
+        children = []
+
+        for target, action in self.get_moves(blank):
+            # Make new state by swapping the blank with the target position
+            temp = self.swap(state, blank, target)
+            children.append(
+                (temp, target, action)
+            )  # If the move is valid, add the new state and action to the successors
 
         return children
 
     def find_pos(self, state, tile):
         """ 
             Find the position of a specific tile in the state
-            This is used to calculate the Manhattan Distance heuristic
+            Heuristics use the precomputed goal tables instead of calling this
         """
-        for i in range(3):
-            for j in range(3):
-                if state[i][j] == tile:
-                    return (i, j)
+        for index in range(self.size):
+            if self.get_tile(state, index) == tile:
+                return divmod(index, self.cols)
         return None
 
     def calculate_misplaced_tile_heuristic(self, state):
@@ -93,10 +172,8 @@ class Puzzle:
             Calculate the number of misplaced tiles in the state for the Misplaced Tile heuristic
         """
         count = 0
-        for i in range(3):
-            for j in range(3):
-                if state[i][j] != self.goal_state[i][j] and state[i][j] != 0:
-                    count += 1
+        for index in range(self.size):
+            count += self.misplaced_table[self.get_tile(state, index)][index]
         return count
 
     def calculate_manhattan_distance_heuristic(self, state):
@@ -104,9 +181,126 @@ class Puzzle:
             Calculate distance for each tile from its goal position for the Manhattan Distance heuristic
         """
         dist = 0
-        for i in range(3):
-            for j in range(3):
-                if state[i][j] != 0:
-                    goal_pos = self.find_pos(self.goal_state, state[i][j])
-                    dist += abs(i - goal_pos[0]) + abs(j - goal_pos[1])
+        for index in range(self.size):
+            dist += self.manhattan_table[self.get_tile(state, index)][index]
         return dist
+
+    def misplaced_tile_delta(self, state, tile, src, dst):
+        """
+            Change in the Misplaced Tile heuristic when tile slides from src to dst
+            Only the tile that moved can change, so this is a two entry table lookup
+        """
+        return self.misplaced_table[tile][dst] - self.misplaced_table[tile][src]
+
+    def manhattan_distance_delta(self, state, tile, src, dst):
+        """
+            Change in the Manhattan Distance heuristic when tile slides from src to dst
+        """
+        return self.manhattan_table[tile][dst] - self.manhattan_table[tile][src]
+
+    def tile_order(self, state):
+        """
+            Tiles of the state in reading order, without the blank
+        """
+        tiles = [self.get_tile(state, index) for index in range(self.size)]
+        return [tile for tile in tiles if tile != 0]
+
+    def count_inversions(self, state):
+        """ 
+            Count the pairs of tiles that are in the wrong order, ignoring the blank
+        """
+        tiles = self.tile_order(state)
+        inversions = 0
+        for i in range(len(tiles)):
+            for j in range(i + 1, len(tiles)):
+                if tiles[i] > tiles[j]:
+                    inversions += 1
+        return inversions
+
+    def parity(self, state):
+        """ 
+            Parity that no move can change, used for the solvability check
+            Moving the blank sideways never changes the inversion count. Moving it up
+            or down jumps a tile over cols - 1 others, which keeps the inversion parity
+            for odd widths and flips it for even widths, so for even widths the blank's
+            row is added in to cancel that flip.
+        """
+        parity = self.count_inversions(state)
+        if self.cols % 2 == 0:
+            parity += self.find_blank_tile(state) // self.cols
+        return parity % 2
+
+    def is_solvable(self, state=None):
+        """ 
+            Check if the goal can be reached from the state (initial state by default)
+            Half of all boards can never reach the goal, this catches them in O(n^2)
+            instead of letting the search explore every reachable state first
+            On a single row or column tiles can never pass each other, so only
+            boards with their tiles already in goal order are solvable
+        """
+        if state is None:
+            state = self.initial_packed
+        if self.rows == 1 or self.cols == 1:
+            return self.tile_order(state) == self.tile_order(self.goal_packed)
+        return self.parity(state) == self.parity(self.goal_packed)
+
+    def get_pattern_db(self):
+        """ 
+            Load the additive pattern database for this goal, building it on first use
+            Built databases are cached on disk, see pattern_db.py
+        """
+        if self.pattern_db is None:
+            self.pattern_db = pattern_db.load_or_build(self)
+        return self.pattern_db
+
+    def get_distance_table(self):
+        """ 
+            Load the complete distance table for this goal, building it on first use
+            Only boards with up to 9 cells have one, see distance_table.py
+        """
+        if self.distance_table is None:
+            self.distance_table = distance_table.load_or_build(self)
+        return self.distance_table
+
+    def get_batch_heuristics(self):
+        """
+            Load the NumPy heuristics that score many boards at once, see vectorized.py
+            NumPy is only imported here and when a distance table is built, the
+            search itself never needs it
+        """
+        if self.batch_heuristics is None:
+            from vectorized import BatchHeuristics
+
+            self.batch_heuristics = BatchHeuristics(self)
+        return self.batch_heuristics
+
+    def get_heuristic(self, name):
+        """
+            Look up a heuristic by name
+            Returns (full, delta): full scores a whole state and
+            delta(state, tile, src, dst) gives the change in h after tile slides
+        """
+        if name == "pdb":
+            db = self.get_pattern_db()
+            return db.lookup, db.delta
+        if name == "linear_conflict":
+            if self.linear_conflict is None:
+                self.linear_conflict = LinearConflict(self)
+            return self.linear_conflict.lookup, self.linear_conflict.delta
+        if name == "walking_distance":
+            # The tables are built once per process and shared between puzzles
+            if self.walking_distance is None:
+                self.walking_distance = WalkingDistance(self)
+            return self.walking_distance.lookup, self.walking_distance.delta
+
+        heuristics = {
+            "misplaced": (
+                self.calculate_misplaced_tile_heuristic,
+                self.misplaced_tile_delta,
+            ),
+            "manhattan": (
+                self.calculate_manhattan_distance_heuristic,
+                self.manhattan_distance_delta,
+            ),
+        }
+        return heuristics[name]
@@ -4,53 +4,134 @@
 
 import time
 from collections import defaultdict
-from queue import PriorityQueue
+from cancellation import DEADLINE, CancellationToken, frontier_summary
 from node import Node
+from open_list import HeapOpenList
 
 
 TIMEOUT = int(600)  # 10 minutes
+WEIGHT = 1.5  # Default weight on h(n) for weighted A*
 
 
-def generic_search(puzzle, algorithm, timeout=TIMEOUT):
+def unsolvable_result(start):
+    """ 
+        Result returned for a puzzle that fails the solvability check
+        Nothing is expanded, the metrics only record that the puzzle was rejected
+    """
+    metrics = {
+        "expanded_nodes": 0,
+        "max_queue_size": 0,
+        "duplicates_pruned": 0,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": True,
+    }
+    return None, defaultdict(int), metrics
+
+
+def stop_metrics(metrics, cancel, frontier=None):
+    """ 
+        Record in the metrics why a search was stopped early, and the best node it
+        had not expanded yet
+        timed_out is only set when the deadline passed, not for other budgets
+    """
+    metrics["timed_out"] = cancel.reason == DEADLINE
+    metrics["cancelled"] = cancel.reason
+    metrics["frontier"] = frontier_summary(frontier)
+    return metrics
+
+
+def generic_search(
+    puzzle,
+    algorithm,
+    timeout=TIMEOUT,
+    open_list=HeapOpenList,
+    instrument=None,
+    cancel=None,
+):
     """ 
         Generic search function that takes in a puzzle and an algorithm
         Returns the solution node, depth, and metrics
+        open_list is the frontier class to use, see open_list.py for the options
+        instrument is an optional SearchInstrumentation, see instrumentation.py
+        cancel is an optional CancellationToken, by default the search stops after
+        timeout seconds
         
         Note: this function looks more complex from psuedocode but it's because I added in metrics logging/updating for data visualization
     """
     start = time.time()
     expanded_nodes = 0
     max_queue_size = 1
+    duplicates_pruned = 0
     depth = defaultdict(int)
 
-    # Define heuristic cost
+    # Reject unsolvable puzzles right away instead of exhausting the state space
+    if not puzzle.is_solvable():
+        return unsolvable_result(start)
+
+    # Define heuristic cost, only the initial state is scored in full
+    # Children update their parent's h with the delta for the one tile that slid
+    heuristic = ALGORITHM_HEURISTICS.get(queueing_function(algorithm))
     heuristic_cost = 0
-    if algorithm == a_star_misplaced:
-        heuristic_cost = puzzle.calculate_misplaced_tile_heuristic(puzzle.initial_state)
-    elif algorithm == a_star_manhattan:
-        heuristic_cost = puzzle.calculate_manhattan_distance_heuristic(
-            puzzle.initial_state
-        )
+    delta = None
+    if heuristic is not None:
+        full, delta = puzzle.get_heuristic(heuristic)
+        heuristic_cost = full(puzzle.initial_packed)
 
     # Initialize the priority queue with the initial state
     initial_node = Node(
-        state=puzzle.initial_state, path_cost=0, heuristic_cost=heuristic_cost
+        state=puzzle.initial_packed,
+        path_cost=0,
+        heuristic_cost=heuristic_cost,
+        blank=puzzle.find_blank_tile(puzzle.initial_packed),
     )
-    nodes = PriorityQueue()
+    nodes = open_list()
     nodes.put((initial_node.total_cost(), initial_node))
 
-    while not nodes.empty():
-        # Check for timeout: if timed out, return None
-        if time.time() - start > timeout:
-            metrics = {
-                "expanded_nodes": expanded_nodes,
-                "max_queue_size": max_queue_size,
-                "time": timeout,
-                "timed_out": True,
-            }
-            return None, depth, metrics
+    if cancel is None:
+        cancel = CancellationToken(timeout)
+    check_interval = cancel.check_interval
+    node_budget = cancel.node_budget
+
+    # Functions called in the loop, swapped for timed versions when instrumented
+    get_children = puzzle.get_children
+    make_node = Node
+    next_sample = -1
+    if instrument is not None:
+        nodes.get = instrument.timed("queue", nodes.get)
+        nodes.put = instrument.timed("queue", nodes.put)
+        get_children = instrument.timed("children", get_children)
+        make_node = instrument.timed("nodes", make_node)
+        if delta is not None:
+            delta = instrument.timed("heuristic", delta)
+        next_sample = instrument.sample_interval
+        instrument.start(puzzle)
 
+    # Explored-state index: the best g(n) seen so far for every state that has been
+    # generated. An expanded state is reopened when a cheaper path to it turns up,
+    # which only happens with an inconsistent heuristic such as the pattern database
+    # Packed states are plain integers so they can be hashed directly
+    best_g = {puzzle.initial_packed: 0}
+
+    result = None
+    stopped = None
+    while not nodes.empty():
         _, node = nodes.get()
+
+        # Skip stale queue entries: a cheaper path to the state was found after
+        # this entry was queued, or it was already expanded at this cost
+        if node.path_cost > best_g[node.state]:
+            duplicates_pruned += 1
+            continue
+
+        # Check the deadline and budgets every check_interval expansions, and stop
+        # the moment the node budget is reached
+        # If the search stops, the node just popped is the best one on the frontier
+        if (
+            expanded_nodes % check_interval == 0 or expanded_nodes == node_budget
+        ) and cancel.check(expanded_nodes):
+            stopped = node
+            break
         expanded_nodes += 1
 
         current_depth = node.path_cost
@@ -58,43 +139,47 @@ def generic_search(puzzle, algorithm, timeout=TIMEOUT):
 
         # Check if goal state is reached - if so, return the solution node 
         if puzzle.goal_test(node.state):
-            metrics = {
-                "expanded_nodes": expanded_nodes,
-                "max_queue_size": max_queue_size,
-                "time": time.time() - start,
-                "timed_out": False,
-            }
-            node.update_metrics(expanded_nodes, max_queue_size)
-            return node, depth, metrics
+            result = node
+            break
 
         # Update max queue size for data visualization
         current_queue_size = nodes.qsize()
         if current_queue_size > max_queue_size:
             max_queue_size = current_queue_size
 
-        for successor_state, action in puzzle.get_children(node.state):
+        if expanded_nodes == next_sample:
+            instrument.sample(expanded_nodes, current_queue_size)
+            next_sample += instrument.sample_interval
+
+        for successor_state, successor_blank, action in get_children(
+            node.state, node.blank
+        ):
+            # Drop children whose g(n) is no better than the best already seen
+            child_cost = node.path_cost + 1
+            if best_g.get(successor_state, child_cost + 1) <= child_cost:
+                duplicates_pruned += 1
+                continue
+            best_g[successor_state] = child_cost
+
             # Calculate heuristic cost for child node
-            if algorithm == a_star_misplaced:
-                # A* with Misplaced Tile Heuristic
-                child_heuristic = puzzle.calculate_misplaced_tile_heuristic(
-                    successor_state
-                )
-            elif algorithm == a_star_manhattan:
-                # A* with Manhattan Distance Heuristic
-                child_heuristic = puzzle.calculate_manhattan_distance_heuristic(
-                    successor_state
-                )
-            else:
+            if delta is None:
                 # Uniform Cost Search
                 child_heuristic = 0
+            else:
+                # The tile that slid went from the child's blank to the parent's blank
+                tile = puzzle.get_tile(node.state, successor_blank)
+                child_heuristic = node.heuristic_cost + delta(
+                    successor_state, tile, successor_blank, node.blank
+                )
 
             # Create child node
-            child = Node(
+            child = make_node(
                 state=successor_state,
                 parent=node,
                 action=action,
-                path_cost=node.path_cost + 1,
+                path_cost=child_cost,
                 heuristic_cost=child_heuristic,
+                blank=successor_blank,
             )
 
             nodes = algorithm(nodes, child, puzzle)
@@ -102,10 +187,25 @@ def generic_search(puzzle, algorithm, timeout=TIMEOUT):
     metrics = {
         "expanded_nodes": expanded_nodes,
         "max_queue_size": max_queue_size,
+        "duplicates_pruned": duplicates_pruned,
         "time": time.time() - start,
         "timed_out": False,
+        "unsolvable": False,
+        "bound": suboptimality_bound(algorithm),
     }
-    return None, depth, metrics
+    # Open lists that spill to disk report their peak in memory and bytes written
+    spill_metrics = getattr(nodes, "spill_metrics", None)
+    if spill_metrics is not None:
+        metrics.update(spill_metrics())
+        if result is not None and metrics["spilled_nodes"]:
+            # Nodes read back from disk have no parents, replay the path instead
+            result = build_solution(puzzle, result.get_actions(), heuristic)
+        nodes.close()
+    if stopped is not None:
+        stop_metrics(metrics, cancel, stopped)
+    if instrument is not None:
+        instrument.finish(metrics)
+    return result, depth, metrics
 
 
 def uniform_cost_search(pQueue, child, puzzle=None):
@@ -123,20 +223,286 @@ def a_star_misplaced(pQueue, child, puzzle=None):
         A* with Misplaced Tile Heuristic algorithm
         Returns the priority queue with the child node added and heuristic cost using the Misplaced Tile Heuristic
     """
-    # Calculate heuristic cost using misplaced tile heuristic
-    heuristic_cost = puzzle.calculate_misplaced_tile_heuristic(child.state)
-    total_cost = child.path_cost + heuristic_cost
-    pQueue.put((total_cost, child))
+    # Heuristic cost was already set on the child using the misplaced tile heuristic
+    pQueue.put((child.total_cost(), child))
     return pQueue
 
 
-def a_star_manhattan(pQueue, child, puzzle):
+def a_star_manhattan(pQueue, child, puzzle=None):
     """ 
         A* with Manhattan Distance Heuristic algorithm
         Returns the priority queue with the child node added and heuristic cost using the Manhattan Distance Heuristic
     """
-    # Calculate heuristic cost using Manhattan distance heuristic
-    heuristic_cost = puzzle.calculate_manhattan_distance_heuristic(child.state)
-    total_cost = child.path_cost + heuristic_cost
-    pQueue.put((total_cost, child))
+    # Heuristic cost was already set on the child using the Manhattan distance heuristic
+    pQueue.put((child.total_cost(), child))
     return pQueue
+
+
+def a_star_pdb(pQueue, child, puzzle=None):
+    """ 
+        A* with the additive Pattern Database Heuristic algorithm
+        Returns the priority queue with the child node added and heuristic cost using the Pattern Database Heuristic
+    """
+    # Heuristic cost was already set on the child using the pattern database
+    pQueue.put((child.total_cost(), child))
+    return pQueue
+
+
+def a_star_linear_conflict(pQueue, child, puzzle=None):
+    """ 
+        A* with Manhattan Distance plus Linear Conflicts algorithm
+        Returns the priority queue with the child node added and heuristic cost using the Linear Conflict Heuristic
+    """
+    # Heuristic cost was already set on the child using the linear conflict tables
+    pQueue.put((child.total_cost(), child))
+    return pQueue
+
+
+def a_star_walking_distance(pQueue, child, puzzle=None):
+    """ 
+        A* with the Walking Distance Heuristic algorithm
+        Returns the priority queue with the child node added and heuristic cost using the Walking Distance Heuristic
+        Only boards up to 4x4 have tables, see walking_distance.MAX_LINE
+    """
+    # Heuristic cost was already set on the child using the walking distance tables
+    pQueue.put((child.total_cost(), child))
+    return pQueue
+
+
+def weighted_a_star(pQueue, child, puzzle=None, weight=WEIGHT):
+    """ 
+        Weighted A* with the Manhattan Distance Heuristic, f(n) = g(n) + w * h(n)
+        Returns the priority queue with the child node added
+        Pick the weight with partial(weighted_a_star, weight=w), the path found is at
+        most w times longer than optimal
+    """
+    # Priority is a float for fractional weights, so use the heap open list
+    pQueue.put((child.path_cost + weight * child.heuristic_cost, child))
+    return pQueue
+
+
+# Heuristic each algorithm orders its queue by, see Puzzle.get_heuristic
+ALGORITHM_HEURISTICS = {
+    uniform_cost_search: None,
+    a_star_misplaced: "misplaced",
+    a_star_manhattan: "manhattan",
+    a_star_pdb: "pdb",
+    a_star_linear_conflict: "linear_conflict",
+    a_star_walking_distance: "walking_distance",
+    weighted_a_star: "manhattan",
+}
+
+
+def queueing_function(algorithm):
+    """ 
+        The queueing function behind an algorithm, unwrapping partials such as
+        partial(weighted_a_star, weight=2)
+    """
+    return getattr(algorithm, "func", algorithm)
+
+
+def suboptimality_bound(algorithm):
+    """ 
+        How many times longer than optimal the path found by a queueing algorithm
+        can be, 1 for the exact searches
+    """
+    if queueing_function(algorithm) is weighted_a_star:
+        weight = getattr(algorithm, "keywords", {}).get("weight", WEIGHT)
+        # A weight below 1 keeps h(n) admissible, so the search stays exact
+        return float(max(1.0, weight))
+    return 1.0
+
+
+def build_solution(puzzle, actions, heuristic=None):
+    """ 
+        Replay a list of actions from the initial state and chain up the Nodes
+        This is used by searches that only keep the moves, not a tree of Nodes
+        Returns the last node of the path, which is the goal node for a solution
+    """
+    delta = None
+    heuristic_cost = 0
+    if heuristic is not None:
+        full, delta = puzzle.get_heuristic(heuristic)
+        heuristic_cost = full(puzzle.initial_packed)
+
+    node = Node(
+        state=puzzle.initial_packed,
+        path_cost=0,
+        heuristic_cost=heuristic_cost,
+        blank=puzzle.find_blank_tile(puzzle.initial_packed),
+    )
+    for action in actions:
+        target = dict((a, t) for t, a in puzzle.get_moves(node.blank))[action]
+        state = puzzle.swap(node.state, node.blank, target)
+        if delta is not None:
+            tile = puzzle.get_tile(node.state, target)
+            heuristic_cost += delta(state, tile, target, node.blank)
+        node = Node(
+            state=state,
+            parent=node,
+            action=action,
+            path_cost=node.path_cost + 1,
+            heuristic_cost=heuristic_cost,
+            blank=target,
+        )
+    return node
+
+
+def ida_star(puzzle, heuristic="manhattan", timeout=TIMEOUT, cancel=None):
+    """ 
+        IDA* search: depth-first search bounded by f = g + h, raising the bound to the
+        smallest f that went over it after each iteration
+        A single board is changed in place and undone on the way back up, and the move
+        that reverses the previous one is never tried, so memory is O(depth)
+        Returns the solution node, depth, and metrics like generic_search
+        cancel is an optional CancellationToken, see generic_search
+    """
+    start = time.time()
+    if not puzzle.is_solvable():
+        # Otherwise IDA* would keep raising the bound until it timed out
+        return unsolvable_result(start)
+    if cancel is None:
+        cancel = CancellationToken(timeout)
+    check_interval = cancel.check_interval
+    node_budget = cancel.node_budget
+
+    full, delta = puzzle.get_heuristic(heuristic)
+    depth = defaultdict(int)
+    found = -1
+
+    # Current board, its blank and h, plus the actions taken to reach it
+    state = puzzle.initial_packed
+    blank = puzzle.find_blank_tile(state)
+    h = full(state)
+    path = []
+
+    expanded_nodes = 0
+    max_path_length = 1
+    reverse_moves_pruned = 0
+    stopped = False
+
+    def search(g, bound, previous_blank):
+        """ 
+            Depth-first search below the current board
+            Returns found if the goal was reached, otherwise the smallest f over bound
+        """
+        nonlocal state, blank, h, expanded_nodes, max_path_length
+        nonlocal reverse_moves_pruned, stopped
+
+        f = g + h
+        if f > bound:
+            return f
+        if puzzle.goal_test(state):
+            return found
+
+        expanded_nodes += 1
+        depth[g] += 1
+        if g + 1 > max_path_length:
+            max_path_length = g + 1
+
+        # Check the deadline and budgets every check_interval expansions, and stop
+        # the moment the node budget is reached
+        if (
+            expanded_nodes % check_interval == 0 or expanded_nodes == node_budget
+        ) and cancel.check(expanded_nodes):
+            stopped = True
+            return found
+
+        minimum = None
+        for target, action in puzzle.get_moves(blank):
+            # Sliding the blank back to where it came from undoes the last move
+            if target == previous_blank:
+                reverse_moves_pruned += 1
+                continue
+
+            # Make the move in place
+            tile = puzzle.get_tile(state, target)
+            parent_blank, parent_h = blank, h
+            state = puzzle.swap(state, blank, target)
+            h += delta(state, tile, target, parent_blank)
+            blank = target
+            path.append(action)
+
+            t = search(g + 1, bound, parent_blank)
+            if t == found:
+                return found
+
+            # Undo the move
+            path.pop()
+            state = puzzle.swap(state, blank, parent_blank)
+            blank, h = parent_blank, parent_h
+
+            if t is not None and (minimum is None or t < minimum):
+                minimum = t
+        return minimum
+
+    bound = h
+    iterations = 0
+    while True:
+        iterations += 1
+        t = search(0, bound, None)
+        if t == found or t is None:
+            break
+        bound = t
+
+    metrics = {
+        "expanded_nodes": expanded_nodes,
+        "max_queue_size": max_path_length,
+        "duplicates_pruned": reverse_moves_pruned,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": False,
+        "iterations": iterations,
+    }
+    if stopped:
+        # The board being expanded when the search stopped is its frontier
+        frontier = build_solution(puzzle, path, heuristic)
+        return None, depth, stop_metrics(metrics, cancel, frontier)
+    if t is None:
+        # Nothing left under any bound
+        return None, depth, metrics
+
+    return build_solution(puzzle, path, heuristic), depth, metrics
+
+
+def table_search(puzzle, timeout=TIMEOUT, cancel=None):
+    """ 
+        Solve by walking down the precomputed distance table, no search at all
+        The table is built once per goal and cached on disk, see distance_table.py
+        Returns the solution node, depth, and metrics like generic_search
+        timeout and cancel are only accepted to match the other searches, a lookup
+        takes microseconds
+    """
+    start = time.time()
+    if not puzzle.is_solvable():
+        return unsolvable_result(start)
+
+    actions = puzzle.get_distance_table().solve(puzzle)
+    node = build_solution(puzzle, actions)
+
+    # Each step looks at the neighbors of one state, like one expansion
+    depth = defaultdict(int)
+    for g in range(len(actions)):
+        depth[g] += 1
+    metrics = {
+        "expanded_nodes": len(actions),
+        "max_queue_size": 0,
+        "duplicates_pruned": 0,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": False,
+    }
+    return node, depth, metrics
+
+
+def solve(puzzle, algorithm, timeout=TIMEOUT, cancel=None):
+    """ 
+        Run any algorithm on a puzzle
+        Queueing algorithms like a_star_manhattan go through generic_search, whole
+        searches like ida_star are called directly
+        cancel is an optional CancellationToken, it replaces timeout when given
+        Returns the solution node, depth, and metrics
+    """
+    if queueing_function(algorithm) in ALGORITHM_HEURISTICS:
+        return generic_search(puzzle, algorithm, timeout, cancel=cancel)
+    return algorithm(puzzle, timeout=timeout, cancel=cancel)
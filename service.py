@@ -0,0 +1,361 @@
+"""
+    Purpose: Solve service -> asyncio API over a process pool, with request
+    coalescing, backpressure, per-request deadlines, and a small HTTP front end
+
+    await service.solve(initial_state, "manhattan") returns (actions, metrics) like
+    batch.solve_one. The solve runs in a worker process, so the event loop stays free.
+    Requests for a board that is already being solved wait on that solve instead of
+    starting another one. If that solve runs out of time while a request still has
+    time left, the request starts a new solve with the time it has left.
+    At most max_pending solves are queued or running; requests past that wait for a
+    slot, and once max_waiting solves are waiting new ones are turned away with
+    ServiceOverloaded.
+
+    Run the HTTP front end with: python service.py --port 8080 (or --unix PATH)
+        POST /solve  {"initial_state": "072461358", "algorithm": "manhattan",
+                      "timeout": 5, "compact": true}
+                     compact answers with the moves as one "UDLR" string
+        GET /stats
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import ALGORITHMS, solve_one
+from puzzle import Puzzle, make_goal_state
+from search import TIMEOUT
+from solution import encode
+from solve_cache import algorithm_name
+from stream import to_board
+
+# Solves queued or running in the pool, per worker
+PENDING_PER_WORKER = 4
+# Solves allowed to wait for a pool slot before requests are turned away
+MAX_WAITING = 256
+# Deadline for a request that does not set one, in seconds
+REQUEST_TIMEOUT = 30.0
+
+HTTP_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class ServiceOverloaded(Exception):
+    """
+        Raised when too many solves are already waiting for the pool
+    """
+
+
+class SolveService:
+    def __init__(
+        self,
+        workers=None,
+        max_pending=None,
+        max_waiting=MAX_WAITING,
+        timeout=REQUEST_TIMEOUT,
+        cache=None,
+    ):
+        """
+            workers: worker processes, one per CPU by default
+            max_pending: solves queued or running in the pool at once
+            max_waiting: solves waiting for a slot before requests are turned away
+            timeout: deadline in seconds for requests that do not give one
+            cache: optional SolveCache checked before anything is sent to the pool
+        """
+        workers = workers or os.cpu_count() or 1
+        # Forked workers would inherit open client sockets and keep them from closing
+        context = multiprocessing.get_context("spawn")
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self.slots = asyncio.Semaphore(max_pending or workers * PENDING_PER_WORKER)
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.cache = cache
+
+        # Solves in progress, keyed by board and algorithm
+        self.in_flight = {}
+        self.waiting = 0
+
+        self.requests = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+
+    async def solve(self, initial_state, algorithm="manhattan", timeout=None):
+        """
+            Solve one board, given as a digit string, a flat list, or a list of rows
+            algorithm is a name from batch.ALGORITHMS
+            Returns (actions, metrics), metrics["coalesced"] says whether the work was
+            shared with an earlier request
+            Raises ValueError for a bad request, ServiceOverloaded when the queue is
+            full, and TimeoutError when the deadline passes first or the solve it
+            waited on ran out of time without a solution
+        """
+        self.requests += 1
+        board = to_board(initial_state)
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        algo = ALGORITHMS[algorithm]
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        puzzle = Puzzle(board, make_goal_state(len(board), len(board[0])))
+        if self.cache is not None:
+            entry = self.cache.get(puzzle, algo)
+            if entry is not None:
+                self.cache_hits += 1
+                actions, metrics = entry
+                return actions, dict(metrics, cache_hit=True, coalesced=False)
+
+        key = (puzzle.rows, puzzle.cols, puzzle.initial_packed, algorithm_name(algo))
+        while True:
+            task = self.in_flight.get(key)
+            coalesced = task is not None and not task.done()
+            if coalesced:
+                self.coalesced += 1
+            else:
+                if self.waiting >= self.max_waiting:
+                    self.rejected += 1
+                    raise ServiceOverloaded("Too many solves waiting, try again later")
+                # Counted here, not in run, so a burst of requests sees it right away
+                self.waiting += 1
+                task = asyncio.ensure_future(self.run(puzzle, algo, deadline))
+                self.in_flight[key] = task
+                task.add_done_callback(lambda done: self.finished(key, done))
+
+            # Shielded so one request giving up does not cancel the solve for the
+            # others, each request waits only for the time it has left
+            try:
+                actions, metrics = await asyncio.wait_for(
+                    asyncio.shield(task), deadline - loop.time()
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise TimeoutError(f"No solution within {timeout} seconds")
+            if actions is not None or not metrics["timed_out"]:
+                return actions, dict(metrics, coalesced=coalesced)
+            # The solve joined was started for an earlier deadline, try again with
+            # this request's own deadline if it has not passed yet
+            if not coalesced or loop.time() >= deadline:
+                self.timeouts += 1
+                raise TimeoutError(f"No solution within {timeout} seconds")
+
+    def finished(self, key, task):
+        """
+            Forget a solve once it is done, unless a newer solve of the same board
+            has replaced it
+        """
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+
+    async def run(self, puzzle, algorithm, deadline):
+        """
+            Wait for a pool slot, then solve in a worker process
+            The worker gets the time left before the deadline as its timeout, so it
+            stops by itself instead of being killed
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        try:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Every request for this board has given up already
+                metrics = {"expanded_nodes": 0, "time": 0.0, "timed_out": True}
+                return None, metrics
+            actions, metrics = await loop.run_in_executor(
+                self.pool,
+                solve_one,
+                puzzle.initial_state,
+                puzzle.goal_state,
+                algorithm,
+                remaining,
+            )
+        finally:
+            self.slots.release()
+
+        if self.cache is not None:
+            self.cache.put(puzzle, algorithm, actions, metrics)
+        return actions, metrics
+
+    def stats(self):
+        """
+            Counters for the service
+        """
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self.in_flight),
+            "waiting": self.waiting,
+        }
+
+    def close(self):
+        """
+            Shut down the worker processes, solves not started yet are dropped
+        """
+        if sys.version_info >= (3, 9):
+            self.pool.shutdown(cancel_futures=True)
+            return
+        # shutdown has no cancel_futures before 3.9, cancelling the solves cancels
+        # their pool futures that have not started
+        for task in self.in_flight.values():
+            task.cancel()
+        self.pool.shutdown(wait=False)
+
+    async def handle(self, reader, writer):
+        """
+            Answer one HTTP request on a connection, then close it
+        """
+        try:
+            request_line = await reader.readline()
+            method, path, _ = request_line.decode().split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            status, payload = await self.route(method, path, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode()
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        """
+            Returns (status, payload) for a request
+        """
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method != "POST" or path != "/solve":
+            return 404, {"error": f"No route for {method} {path}"}
+
+        request = json.loads(body or b"{}")
+        if not isinstance(request, dict):
+            raise ValueError("Expected a JSON object")
+        timeout = request.get("timeout")
+        if timeout is not None and (
+            isinstance(timeout, bool)
+            or not isinstance(timeout, (int, float))
+            or not timeout > 0
+        ):
+            raise ValueError(f"timeout must be a positive number, got {timeout!r}")
+        try:
+            actions, metrics = await self.solve(
+                request.get("initial_state"),
+                request.get("algorithm", "manhattan"),
+                timeout,
+            )
+        except ServiceOverloaded as e:
+            return 503, {"error": str(e)}
+        except TimeoutError as e:
+            return 504, {"error": str(e)}
+
+        if request.get("compact") and actions is not None:
+            actions = encode(actions)
+        return 200, {
+            "moves": actions,
+            "depth": None if actions is None else len(actions),
+            "expanded_nodes": metrics["expanded_nodes"],
+            "time": metrics["time"],
+            "timed_out": metrics["timed_out"],
+            "unsolvable": metrics.get("unsolvable", False),
+            "coalesced": metrics["coalesced"],
+        }
+
+
+async def serve(host="127.0.0.1", port=8080, unix=None, **options):
+    """
+        Run the HTTP front end until interrupted
+        options are passed on to SolveService
+    """
+    service = SolveService(**options)
+    if unix is not None:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Solve service listening on {where}", flush=True)
+
+    # Shut the worker processes down on SIGTERM too, not only on Ctrl-C
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        async with server:
+            serving = asyncio.ensure_future(server.serve_forever())
+            await stop.wait()
+            serving.cancel()
+    finally:
+        service.close()
+
+
+def parse_args():
+    """
+        Command line options for the service
+    """
+    parser = argparse.ArgumentParser(description="8-Puzzle solve service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=REQUEST_TIMEOUT,
+        help="longest deadline a request can have (default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.unix,
+                workers=args.workers,
+                timeout=min(args.timeout, TIMEOUT),
+            )
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,103 @@
+"""
+    Purpose: Compact solutions -> move strings, 2-bit packing, lazy replay and
+    verification, removal of moves that undo each other
+
+    A solution is stored as its moves only, one letter per move ("UDLR", the
+    direction the blank slides) or 2 bits per move, instead of a board per step.
+    The boards are regenerated on demand by replaying the moves from the start.
+"""
+
+import struct
+
+from node import ACTIONS, MOVES, REVERSE_ACTIONS, pack_moves, unpack_moves
+
+LETTERS = {"up": "U", "down": "D", "left": "L", "right": "R"}
+ACTION_OF = {letter: action for action, letter in LETTERS.items()}
+
+# Number of moves in front of the packed moves
+LENGTH = struct.Struct("<I")
+
+
+def encode(actions):
+    """
+        Actions as a move string, e.g. ["up", "left"] -> "UL"
+    """
+    return "".join(LETTERS[action] for action in actions)
+
+
+def decode(moves):
+    """
+        Move string back into actions, raises ValueError for an unknown letter
+    """
+    try:
+        return [ACTION_OF[letter] for letter in moves.upper()]
+    except KeyError as e:
+        raise ValueError(f"Unknown move {e.args[0]!r}, expected U, D, L or R")
+
+
+def to_bytes(actions):
+    """
+        Actions packed 2 bits per move, after a 4 byte move count
+    """
+    packed = pack_moves([MOVES[action] for action in actions])
+    size = (2 * len(actions) + 7) // 8
+    return LENGTH.pack(len(actions)) + packed.to_bytes(size, "little")
+
+
+def from_bytes(data):
+    """
+        Actions packed by to_bytes
+    """
+    (length,) = LENGTH.unpack_from(data)
+    packed = int.from_bytes(data[LENGTH.size :], "little")
+    return [ACTIONS[move] for move in unpack_moves(packed, length)]
+
+
+def replay(puzzle, actions, state=None):
+    """
+        Apply the actions one at a time from the state (initial state by default)
+        Yields (state, blank, action) after each move, nothing is kept, so any
+        length of path replays in constant memory
+        Raises ValueError for a move off the edge of the board
+    """
+    if state is None:
+        state = puzzle.initial_packed
+    blank = puzzle.find_blank_tile(state)
+    for step, action in enumerate(actions, 1):
+        for target, move in puzzle.get_moves(blank):
+            if move == action:
+                break
+        else:
+            raise ValueError(f"Move {step} ({action}) leaves the board")
+        state, blank = puzzle.swap(state, blank, target), target
+        yield state, blank, action
+
+
+def verify(puzzle, actions, state=None):
+    """
+        Check that the actions take the state (initial state by default) to the goal
+    """
+    if state is None:
+        state = puzzle.initial_packed
+    try:
+        for state, _, _ in replay(puzzle, actions, state):
+            pass
+    except ValueError:
+        return False
+    return puzzle.goal_test(state)
+
+
+def simplify(actions):
+    """
+        Drop every move that is undone by the next one, e.g. "ULRD" -> ""
+        Pairs exposed by a removal are dropped too, so the result has none left
+        For move lists from outside the searches, e.g. entered by hand or from
+        another solver, the searches here never revisit a state so never make any
+    """
+    kept = []
+    for action in actions:
+        if kept and kept[-1] == REVERSE_ACTIONS[action]:
+            kept.pop()
+        else:
+            kept.append(action)
+    return kept
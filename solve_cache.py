@@ -0,0 +1,212 @@
+"""
+    Purpose: Cache solved puzzles -> bounded in-memory LRU in front of an optional
+    sqlite file that survives restarts
+
+    Entries are keyed by (board size, goal, start state, algorithm) and hold the
+    moves as a "UDLR" string (see solution.py) and the metrics of the solve. Every
+    state on an optimal path is also stored with the rest of the path as its
+    solution, since the suffix of an optimal path is itself optimal.
+"""
+
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from functools import partial
+
+from search import TIMEOUT, solve
+from solution import decode, encode, replay
+
+# Entries kept in memory before the least recently used one is dropped
+CAPACITY = 100_000
+
+# Metrics stored for states that were never searched themselves, only passed through
+# on the optimal path of another state
+SUFFIX_METRICS = {
+    "expanded_nodes": 0,
+    "max_queue_size": 0,
+    "duplicates_pruned": 0,
+    "time": 0.0,
+    "timed_out": False,
+    "unsolvable": False,
+}
+
+
+def algorithm_name(algorithm):
+    """
+        Stable name for an algorithm, partials include their keyword arguments
+        e.g. "a_star_manhattan" or "bidirectional_search(heuristic=manhattan)"
+    """
+    if isinstance(algorithm, partial):
+        options = ",".join(f"{k}={v}" for k, v in sorted(algorithm.keywords.items()))
+        return f"{algorithm_name(algorithm.func)}({options})"
+    return algorithm.__name__
+
+
+def cache_key(puzzle, state, algorithm):
+    """
+        Key for a state of a puzzle solved with an algorithm
+        The board size is part of the key because a 2x3 and a 3x2 board can pack
+        to the same integers
+    """
+    return (puzzle.rows, puzzle.cols, puzzle.goal_packed, state, algorithm)
+
+
+class SolveCache:
+    def __init__(self, capacity=CAPACITY, path=None):
+        """
+            capacity: entries kept in memory
+            path: sqlite file for the on-disk tier, None keeps everything in memory
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+        self.db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS solutions "
+                "(key TEXT PRIMARY KEY, actions TEXT, metrics TEXT)"
+            )
+            self.db.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def disk_key(self, key):
+        """
+            Text form of a key for the sqlite table, packed states can be too big
+            for a sqlite integer
+        """
+        rows, cols, goal, state, algorithm = key
+        return f"{rows}x{cols}:{goal:x}:{state:x}:{algorithm}"
+
+    def get(self, puzzle, algorithm, state=None):
+        """
+            Cached (actions, metrics) for the state (initial state by default)
+            Returns None on a miss
+        """
+        if state is None:
+            state = puzzle.initial_packed
+        key = cache_key(puzzle, state, algorithm_name(algorithm))
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.expand(entry)
+
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT actions, metrics FROM solutions WHERE key = ?",
+                (self.disk_key(key),),
+            ).fetchone()
+            if row is not None:
+                moves = row[0]
+                # Files written before moves were stored as strings hold JSON lists
+                if moves is not None and moves.startswith("["):
+                    moves = encode(json.loads(moves))
+                entry = (moves, json.loads(row[1]))
+                self.remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return self.expand(entry)
+
+        self.misses += 1
+        return None
+
+    def expand(self, entry):
+        """
+            Stored (moves, metrics) entry as (actions, metrics)
+        """
+        moves, metrics = entry
+        return (None if moves is None else decode(moves)), metrics
+
+    def put(self, puzzle, algorithm, actions, metrics):
+        """
+            Store the solution of the puzzle's initial state
+            When the solution is optimal every state along the path is stored too,
+            with the remaining actions as its solution
+            Timed out or cancelled solves are not stored, the next try may get further
+        """
+        if metrics["timed_out"] or metrics.get("cancelled"):
+            return
+        # Searches that trade path length for speed report a bound above 1
+        optimal = (metrics.get("bound") or 1.0) <= 1.0
+        name = algorithm_name(algorithm)
+        state = puzzle.initial_packed
+        moves = None if actions is None else encode(actions)
+        entries = [(cache_key(puzzle, state, name), (moves, metrics))]
+
+        if actions and optimal:
+            steps = replay(puzzle, actions[:-1], state)
+            for i, (state, _, _) in enumerate(steps, 1):
+                entry = (moves[i:], SUFFIX_METRICS)
+                entries.append((cache_key(puzzle, state, name), entry))
+
+        for key, entry in entries:
+            self.remember(key, entry)
+
+        if self.db is not None:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                    [
+                        (self.disk_key(key), a, json.dumps(m))
+                        for key, (a, m) in entries
+                    ],
+                )
+
+    def remember(self, key, entry):
+        """
+            Add an entry to the in-memory tier, dropping the least recently used
+            entries once it is over capacity
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def solve(self, puzzle, algorithm, timeout=TIMEOUT):
+        """
+            Solve a puzzle through the cache, searching only on a miss
+            Returns (actions, metrics) like batch.solve_one, metrics["cache_hit"] says
+            whether the search was skipped
+        """
+        entry = self.get(puzzle, algorithm)
+        if entry is not None:
+            actions, metrics = entry
+            return actions, dict(metrics, cache_hit=True)
+
+        result, _, metrics = solve(puzzle, algorithm, timeout)
+        actions = None if result is None else result.get_actions()
+        self.put(puzzle, algorithm, actions, metrics)
+        return actions, dict(metrics, cache_hit=False)
+
+    def stats(self):
+        """
+            Counters for the cache, hits includes hits served from disk
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_hits": self.disk_hits,
+            "size": len(self.entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """
+            Close the sqlite file, if there is one
+        """
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,67 @@
+"""
+    Purpose: Define the compact board encoding -> packed integer states and moves
+"""
+
+# Each tile is stored in 4 bits, cell i of the board lives in bits 4i to 4i + 3
+# Boards with more than 16 cells (24-puzzle) need 5 bits, see tile_bits
+TILE_BITS = 4
+
+
+def tile_bits(size):
+    """
+        Number of bits needed per tile on a board with size cells
+    """
+    return max(TILE_BITS, (size - 1).bit_length())
+
+
+def pack(board, bits=TILE_BITS):
+    """
+        Pack a list-of-lists board into a single integer
+        This is used to turn the user's puzzle into the state the search works on
+    """
+    packed = 0
+    index = 0
+    for row in board:
+        for tile in row:
+            packed |= tile << (bits * index)
+            index += 1
+    return packed
+
+
+def unpack(packed, rows=3, cols=3, bits=TILE_BITS):
+    """
+        Unpack an integer state back into the list-of-lists board
+        This is used to print states in the main function
+    """
+    return [
+        [get_tile(packed, row * cols + col, bits) for col in range(cols)]
+        for row in range(rows)
+    ]
+
+
+def get_tile(packed, index, bits=TILE_BITS):
+    """
+        Read the tile stored at a flat board index
+    """
+    return (packed >> (bits * index)) & ((1 << bits) - 1)
+
+
+def find_blank(packed, size=9, bits=TILE_BITS):
+    """
+        Find the flat index of the blank tile in a packed state
+        Only needed once per puzzle, after that the blank index is carried along
+    """
+    mask = (1 << bits) - 1
+    for index in range(size):
+        if (packed >> (bits * index)) & mask == 0:
+            return index
+    return None
+
+
+def slide(packed, blank, target, bits=TILE_BITS):
+    """
+        Slide the tile at target into the blank cell and return the new state
+        The blank cell holds 0 so moving the tile is a single add and subtract
+    """
+    tile = (packed >> (bits * target)) & ((1 << bits) - 1)
+    return packed + (tile << (bits * blank)) - (tile << (bits * target))
@@ -0,0 +1,147 @@
+"""
+    Purpose: Streaming batch mode -> read puzzles one per line, solve them through
+    the batch pipeline, write one JSON record per solve as soon as it finishes
+
+    Every stage is a generator and solve_batch only keeps a few tasks per worker in
+    flight, so memory stays the same however many lines the input has.
+
+    Input lines can be any of:
+        072461358                                   digits, for boards up to 3x3
+        [[0, 7, 2], [4, 6, 1], [3, 5, 8]]           JSON board
+        [0, 7, 2, 4, 6, 1, 3, 5, 8]                 JSON flat list, square boards
+        {"id": "a", "initial_state": [[0, 7, 2], [4, 6, 1], [3, 5, 8]]}
+"""
+
+import json
+import math
+
+from batch import solve_batch
+from puzzle import Puzzle, make_goal_state
+from search import TIMEOUT
+from solution import encode
+
+
+def parse_board(text):
+    """
+        Turn one input line into (board, id), id is None unless the line is a JSON
+        object with an "id"
+        Raises ValueError for anything that is not a board
+    """
+    puzzle_id = None
+    if text.isdigit():
+        return to_board(text), puzzle_id
+
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Not a digit string or JSON: {e}")
+    if isinstance(value, dict):
+        puzzle_id = value.get("id")
+        value = value.get("initial_state")
+    return to_board(value), puzzle_id
+
+
+def to_board(value):
+    """
+        Check a board given as a digit string, a flat list, or a list of rows
+        Returns the board as a list of rows, raises ValueError if it is not a board
+    """
+    board = value
+    if isinstance(board, str) and board.isdigit():
+        board = [int(tile) for tile in board]
+    if not isinstance(board, list) or not board:
+        raise ValueError("Expected a board")
+
+    # A flat list is only accepted for square boards
+    if not isinstance(board[0], list):
+        side = math.isqrt(len(board))
+        if side * side != len(board):
+            raise ValueError(f"{len(board)} tiles do not make a square board")
+        board = [board[i : i + side] for i in range(0, len(board), side)]
+
+    if any(not isinstance(row, list) or len(row) != len(board[0]) for row in board):
+        raise ValueError("Each row must contain the same number of numbers")
+    if not board[0]:
+        raise ValueError("The board needs at least one row and one column")
+    flattened = [tile for row in board for tile in row]
+    if not all(isinstance(tile, int) for tile in flattened):
+        raise ValueError("Tiles must be whole numbers")
+    if sorted(flattened) != list(range(len(flattened))):
+        raise ValueError(
+            f"The board must include all numbers from 0 to {len(flattened) - 1} "
+            "with no duplicates"
+        )
+    return board
+
+
+def solve_stream(
+    lines, algorithm, workers=None, timeout=TIMEOUT, cache=None, compact=False
+):
+    """
+        Solve every puzzle in lines with the algorithm
+        Yields one record per non-blank line in the order the solves finish,
+        lines that are not boards, or whose solve raised, give a record with an
+        "error" instead
+        compact writes the moves as a "UDLR" string instead of a list of actions
+    """
+    # Details of the puzzles in flight, emptied as results come back
+    pending = {}
+
+    def puzzles():
+        index = 0
+        for line_number, line in enumerate(lines, 1):
+            text = line.strip()
+            if not text:
+                continue
+            # Bad lines go through solve_batch as errors, which hands them straight
+            # back, so they are written as soon as they are read
+            puzzle_id = None
+            try:
+                board, puzzle_id = parse_board(text)
+                puzzle = Puzzle(board, make_goal_state(len(board), len(board[0])))
+            except ValueError as e:
+                puzzle = e
+            pending[index] = (line_number, puzzle_id)
+            index += 1
+            yield puzzle
+
+    for index, actions, metrics in solve_batch(
+        puzzles(), algorithm, workers, timeout, cache
+    ):
+        line_number, puzzle_id = pending.pop(index)
+        record = {"line": line_number}
+        if puzzle_id is not None:
+            record["id"] = puzzle_id
+        if "error" in metrics:
+            record["error"] = metrics["error"]
+            yield record
+            continue
+        moves = actions
+        if compact and actions is not None:
+            moves = encode(actions)
+        record.update(
+            {
+                "moves": moves,
+                "depth": None if actions is None else len(actions),
+                "expanded_nodes": metrics["expanded_nodes"],
+                "time": metrics["time"],
+                "timed_out": metrics["timed_out"],
+                "unsolvable": metrics["unsolvable"],
+            }
+        )
+        if "bound" in metrics:
+            record["bound"] = metrics["bound"]
+        yield record
+
+
+def write_records(records, output):
+    """
+        Write each record as a line of JSON and flush it right away
+        Returns the number of records written
+    """
+    count = 0
+    for record in records:
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        count += 1
+    return count
@@ -0,0 +1,298 @@
+"""
+    Purpose: Bounded-suboptimal searches -> anytime weighted A* (ARA*) and beam search
+
+    Both trade path length for speed and report the bound they achieved in
+    metrics["bound"]: the path found is at most that many times longer than optimal.
+    Weighted A* itself is a queueing function in search.py so it runs through
+    generic_search like the exact A* variants.
+"""
+
+import time
+from collections import defaultdict
+
+from cancellation import CancellationToken
+from node import Node
+from open_list import HeapOpenList
+from search import TIMEOUT, stop_metrics, unsolvable_result
+
+# ARA* starts with this weight on h(n) and lowers it by STEP after every solution
+ANYTIME_WEIGHT = 3.0
+ANYTIME_STEP = 0.5
+# Nodes kept per depth by beam search
+BEAM_WIDTH = 1000
+
+
+def anytime_a_star(
+    puzzle,
+    heuristic="manhattan",
+    timeout=TIMEOUT,
+    weight=ANYTIME_WEIGHT,
+    step=ANYTIME_STEP,
+    cancel=None,
+):
+    """
+        ARA*: weighted A* that finds a first path quickly with a large weight, then
+        lowers the weight and keeps improving the path until it is proven optimal or
+        the timeout is reached
+        Each round reuses the previous round's work: the open list is requeued under
+        the new weight and states improved after they were expanded are opened again
+        Returns the best solution node, depth, and metrics like generic_search, plus
+        "bound", "iterations", and "solutions" (one entry per improvement)
+        cancel is an optional CancellationToken, see generic_search, a stopped search
+        still returns the best solution found before it stopped
+    """
+    start = time.time()
+    if not puzzle.is_solvable():
+        return unsolvable_result(start)
+    if cancel is None:
+        cancel = CancellationToken(timeout)
+
+    full, delta = puzzle.get_heuristic(heuristic)
+    root = Node(
+        state=puzzle.initial_packed,
+        path_cost=0,
+        heuristic_cost=full(puzzle.initial_packed),
+        blank=puzzle.find_blank_tile(puzzle.initial_packed),
+    )
+
+    # Best node found for every generated state, whatever round it came from
+    best = {root.state: root}
+    depth = defaultdict(int)
+    expanded_nodes = 0
+    max_queue_size = 1
+    duplicates_pruned = 0
+    stopped = None
+
+    # Nodes to queue at the start of the next round
+    open_nodes = [root]
+    solution = None
+    bound = None
+    solutions = []
+    iterations = 0
+
+    while True:
+        iterations += 1
+        nodes = HeapOpenList()
+        for node in open_nodes:
+            nodes.put((node.path_cost + weight * node.heuristic_cost, node))
+        closed = set()
+        # States that got a cheaper path after being expanded this round
+        inconsistent = {}
+
+        while not nodes.empty():
+            priority, node = nodes.heap[0]
+            if node.state in closed or best[node.state] is not node:
+                nodes.get()
+                duplicates_pruned += 1
+                continue
+
+            # The goal's priority is its g(n), so this also stops when it comes out
+            goal = best.get(puzzle.goal_packed)
+            if goal is not None and goal.path_cost <= priority:
+                break
+
+            # Check the deadline and budgets every check_interval expansions, and stop
+            # the moment the node budget is reached
+            if (
+                expanded_nodes % cancel.check_interval == 0
+                or expanded_nodes == cancel.node_budget
+            ) and cancel.check(expanded_nodes):
+                stopped = node
+                break
+
+            nodes.get()
+            closed.add(node.state)
+            expanded_nodes += 1
+            depth[node.path_cost] += 1
+
+            for successor_state, successor_blank, action in puzzle.get_children(
+                node.state, node.blank
+            ):
+                child_cost = node.path_cost + 1
+                seen = best.get(successor_state)
+                if seen is not None and seen.path_cost <= child_cost:
+                    duplicates_pruned += 1
+                    continue
+
+                if seen is not None:
+                    child_heuristic = seen.heuristic_cost
+                else:
+                    tile = puzzle.get_tile(node.state, successor_blank)
+                    child_heuristic = node.heuristic_cost + delta(
+                        successor_state, tile, successor_blank, node.blank
+                    )
+
+                child = Node(
+                    state=successor_state,
+                    parent=node,
+                    action=action,
+                    path_cost=child_cost,
+                    heuristic_cost=child_heuristic,
+                    blank=successor_blank,
+                )
+                best[successor_state] = child
+                if successor_state in closed:
+                    inconsistent[successor_state] = child
+                else:
+                    nodes.put((child_cost + weight * child_heuristic, child))
+
+            if nodes.qsize() > max_queue_size:
+                max_queue_size = nodes.qsize()
+
+        # Everything not expanded yet, the lowest f(n) among them bounds the optimum
+        open_nodes = [
+            node
+            for _, node in nodes.heap
+            if node.state not in closed and best[node.state] is node
+        ]
+        open_nodes.extend(
+            node for state, node in inconsistent.items() if best[state] is node
+        )
+
+        goal = best.get(puzzle.goal_packed)
+        if goal is not None:
+            lower = min((node.total_cost() for node in open_nodes), default=0)
+            if goal.path_cost == 0 or lower >= goal.path_cost:
+                achieved = 1.0
+            else:
+                achieved = goal.path_cost / lower if lower > 0 else weight
+                # The weight is only guaranteed once a round runs to the end
+                if stopped is None:
+                    achieved = min(weight, achieved)
+                if bound is not None:
+                    achieved = min(bound, achieved)
+                achieved = max(1.0, achieved)
+            if solution is None or goal.path_cost < solution.path_cost:
+                solutions.append(
+                    {
+                        "time": time.time() - start,
+                        "depth": goal.path_cost,
+                        "bound": achieved,
+                        "expanded_nodes": expanded_nodes,
+                    }
+                )
+            solution, bound = goal, achieved
+
+        if stopped is not None or bound == 1.0 or not open_nodes:
+            break
+        weight = max(1.0, weight - step)
+
+    metrics = {
+        "expanded_nodes": expanded_nodes,
+        "max_queue_size": max_queue_size,
+        "duplicates_pruned": duplicates_pruned,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": False,
+        "bound": bound,
+        "iterations": iterations,
+        "solutions": solutions,
+    }
+    if stopped is not None:
+        stop_metrics(metrics, cancel, stopped)
+    return solution, depth, metrics
+
+
+def beam_search(
+    puzzle, heuristic="manhattan", width=BEAM_WIDTH, timeout=TIMEOUT, cancel=None
+):
+    """
+        Breadth-first search that keeps only the width nodes with the lowest h(n) at
+        each depth, so memory is capped at about width nodes per level of the path
+        It can miss the goal altogether, and the path found has no bound ahead of
+        time: the bound reported is its length over h(n) of the initial state
+        cancel is an optional CancellationToken, see generic_search
+        Returns the solution node, depth, and metrics like generic_search
+    """
+    start = time.time()
+    if not puzzle.is_solvable():
+        return unsolvable_result(start)
+    if cancel is None:
+        cancel = CancellationToken(timeout)
+
+    full, delta = puzzle.get_heuristic(heuristic)
+    root = Node(
+        state=puzzle.initial_packed,
+        path_cost=0,
+        heuristic_cost=full(puzzle.initial_packed),
+        blank=puzzle.find_blank_tile(puzzle.initial_packed),
+    )
+
+    # States kept in any beam so far, never more than width per depth
+    seen = {root.state}
+    layer = [root]
+    depth = defaultdict(int)
+    expanded_nodes = 0
+    max_queue_size = 1
+    duplicates_pruned = 0
+    stopped = None
+    result = None
+
+    while layer and result is None and stopped is None:
+        children = []
+        for node in layer:
+            if puzzle.goal_test(node.state):
+                result = node
+                break
+            # Check the deadline and budgets every check_interval expansions, and stop
+            # the moment the node budget is reached
+            if (
+                expanded_nodes % cancel.check_interval == 0
+                or expanded_nodes == cancel.node_budget
+            ) and cancel.check(expanded_nodes):
+                stopped = node
+                break
+            expanded_nodes += 1
+            depth[node.path_cost] += 1
+
+            for successor_state, successor_blank, action in puzzle.get_children(
+                node.state, node.blank
+            ):
+                if successor_state in seen:
+                    duplicates_pruned += 1
+                    continue
+                tile = puzzle.get_tile(node.state, successor_blank)
+                child_heuristic = node.heuristic_cost + delta(
+                    successor_state, tile, successor_blank, node.blank
+                )
+                children.append(
+                    Node(
+                        state=successor_state,
+                        parent=node,
+                        action=action,
+                        path_cost=node.path_cost + 1,
+                        heuristic_cost=child_heuristic,
+                        blank=successor_blank,
+                    )
+                )
+
+        if len(children) > max_queue_size:
+            max_queue_size = len(children)
+
+        # Every child has the same g(n), so the lowest f(n) is the lowest h(n)
+        # The same state can show up twice in one level, keep its first copy
+        layer = []
+        for child in sorted(children):
+            if len(layer) == width:
+                break
+            if child.state not in seen:
+                seen.add(child.state)
+                layer.append(child)
+
+    bound = None
+    if result is not None:
+        lower = root.heuristic_cost
+        bound = result.path_cost / lower if lower > 0 else 1.0
+
+    metrics = {
+        "expanded_nodes": expanded_nodes,
+        "max_queue_size": max_queue_size,
+        "duplicates_pruned": duplicates_pruned,
+        "time": time.time() - start,
+        "timed_out": False,
+        "unsolvable": False,
+        "bound": bound,
+    }
+    if stopped is not None:
+        stop_metrics(metrics, cancel, stopped)
+    return result, depth, metrics
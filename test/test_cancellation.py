@@ -0,0 +1,86 @@
+"""
+    Purpose: Check every search stops promptly on a deadline, a node budget, or a
+    cancel from another thread, and reports why in its metrics
+"""
+
+import threading
+import time
+import unittest
+
+from bidirectional import bidirectional_search
+from cancellation import CANCELLED, DEADLINE, NODE_BUDGET, CancellationToken
+from puzzle import Puzzle, make_goal_state
+from search import a_star_manhattan, ida_star, solve, uniform_cost_search
+from suboptimal import anytime_a_star, beam_search
+from test_cases import fifteen_puzzle_test_cases
+
+# Far too deep for any of these searches to finish while the test waits
+HARD_BOARD = fifteen_puzzle_test_cases[-1]["initial_state"]
+ALGORITHMS = (
+    uniform_cost_search,
+    a_star_manhattan,
+    ida_star,
+    anytime_a_star,
+    beam_search,
+    bidirectional_search,
+)
+# Seconds a stopped search may take to return, far above a check_interval's work
+PROMPT = 1.0
+
+
+class CancellationTest(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = Puzzle(HARD_BOARD, make_goal_state(4, 4))
+
+    def run_search(self, algorithm, cancel):
+        start = time.monotonic()
+        result, _, metrics = solve(self.puzzle, algorithm, cancel=cancel)
+        return result, metrics, time.monotonic() - start
+
+    def test_node_budget(self):
+        for algorithm in ALGORITHMS:
+            with self.subTest(algorithm=algorithm.__name__):
+                cancel = CancellationToken(node_budget=300)
+                result, metrics, _ = self.run_search(algorithm, cancel)
+                self.assertIsNone(result)
+                self.assertEqual(metrics["cancelled"], NODE_BUDGET)
+                self.assertFalse(metrics["timed_out"])
+                self.assertLessEqual(metrics["expanded_nodes"], 300)
+
+    def test_deadline(self):
+        for algorithm in ALGORITHMS:
+            with self.subTest(algorithm=algorithm.__name__):
+                cancel = CancellationToken(timeout=0.1, check_interval=64)
+                result, metrics, seconds = self.run_search(algorithm, cancel)
+                self.assertIsNone(result)
+                self.assertEqual(metrics["cancelled"], DEADLINE)
+                self.assertTrue(metrics["timed_out"])
+                self.assertLess(seconds, 0.1 + PROMPT)
+
+    def test_cancel_from_another_thread(self):
+        for algorithm in ALGORITHMS:
+            with self.subTest(algorithm=algorithm.__name__):
+                cancel = CancellationToken(check_interval=64)
+                timer = threading.Timer(0.1, cancel.cancel)
+                timer.start()
+                try:
+                    result, metrics, seconds = self.run_search(algorithm, cancel)
+                finally:
+                    timer.cancel()
+                self.assertIsNone(result)
+                self.assertEqual(metrics["cancelled"], CANCELLED)
+                self.assertFalse(metrics["timed_out"])
+                self.assertLess(seconds, 0.1 + PROMPT)
+
+    def test_finished_search_is_not_marked_stopped(self):
+        puzzle = Puzzle([[1, 2, 3], [4, 5, 6], [0, 7, 8]], make_goal_state(3, 3))
+        result, _, metrics = solve(
+            puzzle, a_star_manhattan, cancel=CancellationToken(timeout=30)
+        )
+        self.assertEqual(result.path_cost, 2)
+        self.assertFalse(metrics["timed_out"])
+        self.assertNotIn("cancelled", metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
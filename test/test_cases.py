@@ -16,3 +16,116 @@ test_cases = [
     {"initial_state": [[7, 1, 2], [4, 8, 5], [6, 3, 0]], "depth": 20},
     {"initial_state": [[0, 7, 2], [4, 6, 1], [3, 5, 8]], "depth": 24},
 ]
+
+# 15-puzzle instances with their optimal depth, generated by seeded random walks
+# from the goal and solved with IDA*, easy enough to benchmark in pure Python
+fifteen_puzzle_test_cases = [
+    {
+        "initial_state": [
+            [1, 3, 6, 4],
+            [10, 2, 7, 8],
+            [13, 5, 15, 12],
+            [14, 9, 11, 0],
+        ],
+        "depth": 28,
+    },
+    {
+        "initial_state": [
+            [0, 2, 11, 7],
+            [1, 6, 8, 4],
+            [5, 10, 3, 12],
+            [9, 13, 15, 14],
+        ],
+        "depth": 28,
+    },
+    {
+        "initial_state": [
+            [3, 2, 0, 4],
+            [1, 9, 12, 8],
+            [6, 14, 7, 10],
+            [5, 13, 15, 11],
+        ],
+        "depth": 30,
+    },
+    {
+        "initial_state": [
+            [0, 9, 6, 2],
+            [13, 1, 5, 4],
+            [14, 11, 7, 3],
+            [10, 15, 12, 8],
+        ],
+        "depth": 30,
+    },
+    {
+        "initial_state": [
+            [9, 5, 1, 8],
+            [2, 6, 10, 3],
+            [13, 15, 0, 4],
+            [14, 12, 11, 7],
+        ],
+        "depth": 32,
+    },
+    {
+        "initial_state": [
+            [1, 2, 0, 8],
+            [5, 6, 4, 12],
+            [14, 7, 10, 13],
+            [11, 3, 9, 15],
+        ],
+        "depth": 32,
+    },
+    {
+        "initial_state": [
+            [1, 2, 5, 3],
+            [13, 11, 8, 15],
+            [9, 6, 0, 4],
+            [10, 14, 7, 12],
+        ],
+        "depth": 36,
+    },
+    {
+        "initial_state": [
+            [5, 1, 2, 4],
+            [14, 13, 3, 0],
+            [9, 7, 11, 15],
+            [12, 10, 6, 8],
+        ],
+        "depth": 36,
+    },
+    {
+        "initial_state": [
+            [3, 15, 4, 8],
+            [13, 7, 5, 6],
+            [2, 10, 0, 14],
+            [1, 9, 12, 11],
+        ],
+        "depth": 40,
+    },
+    {
+        "initial_state": [
+            [11, 2, 6, 3],
+            [13, 5, 1, 7],
+            [4, 8, 0, 12],
+            [14, 9, 10, 15],
+        ],
+        "depth": 40,
+    },
+    {
+        "initial_state": [
+            [10, 6, 8, 2],
+            [1, 14, 12, 5],
+            [0, 11, 4, 15],
+            [9, 7, 3, 13],
+        ],
+        "depth": 42,
+    },
+    {
+        "initial_state": [
+            [5, 6, 7, 2],
+            [11, 3, 8, 12],
+            [13, 9, 0, 15],
+            [1, 10, 4, 14],
+        ],
+        "depth": 42,
+    },
+]
@@ -0,0 +1,75 @@
+"""
+    Purpose: Check the disk-spilling open list keeps its frontier within the memory
+    budget, finds the same optimal depth as the plain heap, and removes its spill file
+"""
+
+import os
+import tempfile
+import unittest
+
+from open_list import SpillingOpenList
+from puzzle import Puzzle, make_goal_state
+from search import a_star_manhattan, generic_search, uniform_cost_search
+from solution import verify
+from test_cases import test_cases
+
+GOAL_STATE = make_goal_state(3, 3)
+
+
+class SpillingOpenListTest(unittest.TestCase):
+    def setUp(self):
+        self.spill_dir = tempfile.TemporaryDirectory()
+        self.open_lists = []
+
+    def tearDown(self):
+        self.spill_dir.cleanup()
+
+    def open_list(self, memory_budget):
+        """
+            Factory for generic_search that keeps every list it makes
+        """
+
+        def make():
+            open_list = SpillingOpenList(memory_budget, self.spill_dir.name)
+            self.open_lists.append(open_list)
+            return open_list
+
+        return make
+
+    def test_resident_frontier_stays_within_budget(self):
+        puzzle = Puzzle(test_cases[-1]["initial_state"], GOAL_STATE)
+        for budget in (20_000, 200_000):
+            _, _, metrics = generic_search(
+                puzzle, uniform_cost_search, open_list=self.open_list(budget)
+            )
+            self.assertGreater(metrics["spilled_nodes"], 0)
+            self.assertLessEqual(metrics["peak_resident_bytes"], budget)
+            open_list = self.open_lists[-1]
+            self.assertLessEqual(metrics["peak_resident_nodes"], open_list.capacity)
+
+    def test_tiny_budget_keeps_optimal_depth(self):
+        for case in test_cases:
+            puzzle = Puzzle(case["initial_state"], GOAL_STATE)
+            # Every push spills with a one byte budget, keep UCS to the easy cases
+            algorithms = [a_star_manhattan]
+            if case["depth"] <= 16:
+                algorithms.append(uniform_cost_search)
+            for algorithm in algorithms:
+                result, _, _ = generic_search(
+                    puzzle, algorithm, open_list=self.open_list(1)
+                )
+                self.assertEqual(result.path_cost, case["depth"])
+                self.assertTrue(verify(puzzle, result.get_actions()))
+
+    def test_spill_file_is_removed(self):
+        puzzle = Puzzle(test_cases[-1]["initial_state"], GOAL_STATE)
+        _, _, metrics = generic_search(
+            puzzle, uniform_cost_search, open_list=self.open_list(20_000)
+        )
+        self.assertGreater(metrics["spilled_nodes"], 0)
+        self.assertIsNone(self.open_lists[-1].file)
+        self.assertEqual(os.listdir(self.spill_dir.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+    Purpose: Check HDA* finds the optimal depth on any number of workers, reopens
+    states for an inconsistent heuristic, and leaves no worker processes behind
+"""
+
+import multiprocessing
+import unittest
+
+from parallel import hda_star
+from puzzle import Puzzle, make_goal_state
+from solution import verify
+from test_cases import fifteen_puzzle_test_cases, test_cases
+
+WORKERS = (1, 2, 4)
+
+
+def make_puzzle(board):
+    return Puzzle(board, make_goal_state(len(board), len(board[0])))
+
+
+class HDAStarTest(unittest.TestCase):
+    def assertSolves(self, puzzle, depth, heuristic="manhattan"):
+        for workers in WORKERS:
+            result, _, metrics = hda_star(puzzle, heuristic, workers=workers)
+            self.assertEqual(result.path_cost, depth)
+            self.assertTrue(verify(puzzle, result.get_actions()))
+            self.assertEqual(metrics["workers"], workers)
+            expansions = sum(metrics["worker_expansions"])
+            self.assertEqual(expansions, metrics["expanded_nodes"])
+            self.assertFalse(metrics["timed_out"])
+            self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_eight_puzzle(self):
+        for case in test_cases[::3]:
+            self.assertSolves(make_puzzle(case["initial_state"]), case["depth"])
+
+    def test_fifteen_puzzle(self):
+        for case in fifteen_puzzle_test_cases[:3]:
+            self.assertSolves(make_puzzle(case["initial_state"]), case["depth"])
+
+    def test_pattern_database_reopens_states(self):
+        # The pattern database is inconsistent on these boards, see test_search.py
+        for digits, depth in (("023568741", 22), ("872065431", 25)):
+            tiles = [int(digit) for digit in digits]
+            board = [tiles[0:3], tiles[3:6], tiles[6:9]]
+            self.assertSolves(make_puzzle(board), depth, "pdb")
+
+    def test_unsolvable_board_starts_no_workers(self):
+        puzzle = make_puzzle([[2, 1, 3], [4, 5, 6], [7, 8, 0]])
+        result, _, metrics = hda_star(puzzle, workers=2)
+        self.assertIsNone(result)
+        self.assertTrue(metrics["unsolvable"])
+        self.assertEqual(multiprocessing.active_children(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+    Purpose: Check the solvability test before a search is launched, including
+    boards of a single row or column where tiles can never pass each other
+"""
+
+import unittest
+
+from puzzle import Puzzle, make_goal_state
+from search import a_star_manhattan, generic_search
+
+
+class SolvabilityTest(unittest.TestCase):
+    def test_square_board_parity(self):
+        goal_state = make_goal_state(3, 3)
+        solvable = Puzzle([[1, 2, 3], [4, 5, 6], [0, 7, 8]], goal_state)
+        unsolvable = Puzzle([[2, 1, 3], [4, 5, 6], [7, 8, 0]], goal_state)
+        self.assertTrue(solvable.is_solvable())
+        self.assertFalse(unsolvable.is_solvable())
+
+    def test_single_row_needs_goal_order(self):
+        goal_state = [[1, 2, 3, 0]]
+        self.assertTrue(Puzzle([[1, 0, 2, 3]], goal_state).is_solvable())
+        self.assertFalse(Puzzle([[2, 3, 1, 0]], goal_state).is_solvable())
+
+    def test_single_column_needs_goal_order(self):
+        goal_state = [[1], [2], [0]]
+        self.assertTrue(Puzzle([[0], [1], [2]], goal_state).is_solvable())
+        self.assertFalse(Puzzle([[2], [1], [0]], goal_state).is_solvable())
+
+    def test_unsolvable_row_is_reported_without_searching(self):
+        puzzle = Puzzle([[2, 3, 1, 0]], [[1, 2, 3, 0]])
+        actions, _, metrics = generic_search(puzzle, a_star_manhattan)
+        self.assertIsNone(actions)
+        self.assertTrue(metrics["unsolvable"])
+        self.assertEqual(metrics["expanded_nodes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
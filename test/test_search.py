@@ -0,0 +1,48 @@
+"""
+    Purpose: Check the A* searches return optimal depths, compared against the
+    complete distance table on random solvable 3x3 boards
+"""
+
+import random
+import unittest
+
+from puzzle import Puzzle, make_goal_state
+from search import a_star_pdb, generic_search, table_search
+
+GOAL_STATE = make_goal_state(3, 3)
+
+
+def random_boards(count, seed=170):
+    """
+        Yields count random solvable 3x3 puzzles, the same ones every run
+    """
+    rng = random.Random(seed)
+    while count:
+        tiles = list(range(9))
+        rng.shuffle(tiles)
+        puzzle = Puzzle([tiles[0:3], tiles[3:6], tiles[6:9]], GOAL_STATE)
+        if puzzle.is_solvable():
+            count -= 1
+            yield puzzle
+
+
+class OptimalDepthTest(unittest.TestCase):
+    def test_pdb_matches_distance_table(self):
+        # The additive pattern database is admissible but not consistent, so these
+        # boards need closed states to be reopened when a cheaper path turns up
+        for puzzle in random_boards(1500):
+            optimal, _, _ = table_search(puzzle)
+            result, _, metrics = generic_search(puzzle, a_star_pdb)
+            self.assertEqual(result.path_cost, optimal.path_cost)
+            self.assertEqual(metrics["bound"], 1.0)
+
+    def test_known_pdb_boards(self):
+        for digits, depth in (("023568741", 22), ("738102546", 20), ("872065431", 25)):
+            tiles = [int(digit) for digit in digits]
+            puzzle = Puzzle([tiles[0:3], tiles[3:6], tiles[6:9]], GOAL_STATE)
+            result, _, _ = generic_search(puzzle, a_star_pdb)
+            self.assertEqual(result.path_cost, depth)
+
+
+if __name__ == "__main__":
+    unittest.main()
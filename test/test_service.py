@@ -0,0 +1,66 @@
+"""
+    Purpose: Check the solve service shares work between identical requests and
+    still answers a request whose deadline outlasts the solve it joined, and
+    turns away requests with a bad timeout
+"""
+
+import asyncio
+import json
+import unittest
+
+from service import SolveService
+
+# Depth 31, Uniform Cost Search takes about a second on it, long enough for the
+# coalesced requests below to arrive while it is still being solved
+HARD_BOARD = "867254301"
+
+
+class SolveServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SolveService(workers=1)
+
+    async def asyncTearDown(self):
+        self.service.close()
+
+    async def test_identical_requests_coalesce(self):
+        count = 4
+        results = await asyncio.gather(
+            *(self.service.solve(HARD_BOARD, "ucs", 30) for _ in range(count))
+        )
+        self.assertEqual(self.service.stats()["coalesced"], count - 1)
+        shared = [metrics["coalesced"] for _, metrics in results]
+        self.assertEqual(sum(shared), count - 1)
+        for actions, _ in results:
+            self.assertEqual(len(actions), 31)
+
+    async def test_longer_deadline_outlives_shorter_solve(self):
+        # Hold every pool slot so the short request's solve cannot start before its
+        # deadline has passed, however fast the machine is
+        held = 0
+        while not self.service.slots.locked():
+            await self.service.slots.acquire()
+            held += 1
+
+        short = asyncio.ensure_future(self.service.solve(HARD_BOARD, "ucs", 0.05))
+        await asyncio.sleep(0)
+        long = asyncio.ensure_future(self.service.solve(HARD_BOARD, "ucs", 30))
+        with self.assertRaises(TimeoutError):
+            await short
+        for _ in range(held):
+            self.service.slots.release()
+
+        actions, metrics = await long
+        self.assertEqual(self.service.stats()["coalesced"], 1)
+        self.assertEqual(len(actions), 31)
+        self.assertFalse(metrics["timed_out"])
+
+    async def test_bad_timeout_is_rejected(self):
+        for timeout in ("5", 0, -1, True, [5]):
+            body = json.dumps({"initial_state": HARD_BOARD, "timeout": timeout})
+            with self.assertRaises(ValueError):
+                await self.service.route("POST", "/solve", body.encode())
+        self.assertEqual(self.service.stats()["requests"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+    Purpose: Check the solve cache evicts the least recently used entries, keeps
+    solutions in sqlite across restarts, and reuses suffixes of optimal paths only
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from puzzle import Puzzle, make_goal_state
+from search import (
+    a_star_manhattan,
+    a_star_pdb,
+    uniform_cost_search,
+    weighted_a_star,
+)
+from solution import replay, verify
+from solve_cache import SolveCache
+from suboptimal import beam_search
+from test_cases import test_cases
+
+GOAL_STATE = make_goal_state(3, 3)
+# One move from the goal each, so a solve stores no suffixes
+ONE_MOVE_BOARDS = (
+    [[1, 2, 3], [4, 5, 6], [7, 0, 8]],
+    [[1, 2, 3], [4, 5, 0], [7, 8, 6]],
+    [[1, 2, 3], [4, 5, 6], [7, 8, 0]],
+)
+
+
+def random_boards(count, seed=14):
+    """
+        Yields count random solvable 3x3 puzzles, the same ones every run
+    """
+    rng = random.Random(seed)
+    while count:
+        tiles = list(range(9))
+        rng.shuffle(tiles)
+        puzzle = Puzzle([tiles[0:3], tiles[3:6], tiles[6:9]], GOAL_STATE)
+        if puzzle.is_solvable():
+            count -= 1
+            yield puzzle
+
+
+class SolveCacheTest(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = SolveCache(capacity=2)
+        first, second, third = (Puzzle(b, GOAL_STATE) for b in ONE_MOVE_BOARDS)
+        cache.solve(first, uniform_cost_search)
+        cache.solve(second, uniform_cost_search)
+        # Reading the first entry makes the second the least recently used
+        self.assertIsNotNone(cache.get(first, uniform_cost_search))
+        cache.solve(third, uniform_cost_search)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIsNone(cache.get(second, uniform_cost_search))
+        self.assertIsNotNone(cache.get(first, uniform_cost_search))
+        self.assertIsNotNone(cache.get(third, uniform_cost_search))
+
+    def test_sqlite_survives_restart(self):
+        puzzle = Puzzle(test_cases[4]["initial_state"], GOAL_STATE)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "solutions.sqlite")
+            cache = SolveCache(path=path)
+            actions, metrics = cache.solve(puzzle, a_star_manhattan)
+            self.assertFalse(metrics["cache_hit"])
+            cache.close()
+
+            cache = SolveCache(path=path)
+            cached, metrics = cache.solve(puzzle, a_star_manhattan)
+            self.assertTrue(metrics["cache_hit"])
+            self.assertEqual(cached, actions)
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            # Entries are kept per algorithm
+            self.assertIsNone(cache.get(puzzle, uniform_cost_search))
+            cache.close()
+
+    def test_optimal_suffixes_are_reused(self):
+        cache = SolveCache()
+        puzzle = Puzzle(test_cases[-1]["initial_state"], GOAL_STATE)
+        actions, _ = cache.solve(puzzle, a_star_manhattan)
+        self.assertEqual(len(cache), len(actions))
+
+        # Every state on the path is now a hit with the rest of the path
+        steps = replay(puzzle, actions[:-1])
+        for i, (state, _, _) in enumerate(steps, 1):
+            suffix, metrics = cache.get(puzzle, a_star_manhattan, state)
+            self.assertEqual(suffix, actions[i:])
+            self.assertTrue(verify(puzzle, suffix, state))
+            self.assertEqual(metrics["expanded_nodes"], 0)
+
+    def test_suboptimal_suffixes_are_not_cached(self):
+        puzzle = Puzzle(test_cases[-1]["initial_state"], GOAL_STATE)
+        for algorithm in (weighted_a_star, beam_search):
+            cache = SolveCache()
+            actions, metrics = cache.solve(puzzle, algorithm)
+            self.assertGreater(metrics["bound"], 1.0)
+            self.assertIsNotNone(actions)
+            self.assertEqual(len(cache), 1)
+
+    def test_cached_suffixes_are_optimal(self):
+        # A suffix of a path that is not really optimal would be cached as optimal,
+        # check every cached state against the complete distance table
+        cache = SolveCache()
+        table = None
+        for puzzle in random_boards(1500):
+            if table is None:
+                table = puzzle.get_distance_table()
+            cache.solve(puzzle, a_star_pdb)
+            actions, _ = cache.get(puzzle, a_star_pdb)
+            steps = replay(puzzle, actions[:-1])
+            for state, _, _ in steps:
+                suffix, _ = cache.get(puzzle, a_star_pdb, state)
+                self.assertEqual(len(suffix), table.distance(puzzle, state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+    Purpose: Score many boards at once with NumPy -> Manhattan Distance and Misplaced
+    Tile over a (k, cells) uint8 array instead of one packed state at a time
+
+    Unpacking a layer of packed states is a single shift and mask for boards that fit
+    in 64 bits (up to the 15-puzzle), bigger boards are unpacked tile by tile. The
+    search itself keeps using the scalar heuristics, whose deltas are cheaper than
+    rescoring a child from scratch; this is for scoring whole layers or batches.
+    The distance table build ranks each breadth-first layer here the same way.
+"""
+
+import numpy as np
+
+from state import get_tile
+
+
+def unpack_states(states, size=9, bits=4):
+    """
+        Unpack packed states into a (k, size) uint8 array, one board per row
+    """
+    states = list(states)
+    if size * bits > 64:
+        boards = [[get_tile(state, i, bits) for i in range(size)] for state in states]
+        return np.array(boards, dtype=np.uint8).reshape(len(states), size)
+
+    packed = np.array(states, dtype=np.uint64)
+    shifts = np.arange(size, dtype=np.uint64) * np.uint64(bits)
+    mask = np.uint64((1 << bits) - 1)
+    return ((packed[:, None] >> shifts) & mask).astype(np.uint8)
+
+
+def rank_boards(boards):
+    """
+        Lehmer code of every row of a (k, n) array of full boards, the index
+        pattern_db.rank gives a single board, as an int64 array
+    """
+    n = boards.shape[1]
+    ranks = np.zeros(len(boards), dtype=np.int64)
+    for i in range(n):
+        smaller = (boards[:, :i] < boards[:, i : i + 1]).sum(axis=1)
+        ranks = ranks * (n - i) + boards[:, i] - smaller
+    return ranks
+
+
+def first_visits(table, states, size, bits, value, unvisited):
+    """
+        Mark a layer of packed states in table, a bytearray indexed by Lehmer code
+        Every state whose entry is still unvisited is set to value
+        Returns the positions in states of those states, one per distinct state
+    """
+    if not states:
+        return []
+    ranks = rank_boards(unpack_states(states, size, bits))
+    ranks, first = np.unique(ranks, return_index=True)
+    entries = np.frombuffer(table, dtype=np.uint8)
+    new = entries[ranks] == unvisited
+    entries[ranks[new]] = value
+    return first[new].tolist()
+
+
+class BatchHeuristics:
+    def __init__(self, puzzle):
+        """
+            Precompute the goal lookups for a puzzle
+            goal_rows[tile] and goal_cols[tile] hold the tile's goal cell, and
+            cell_rows and cell_cols the coordinates of each board index
+        """
+        self.size = puzzle.size
+        self.bits = puzzle.bits
+        cells = np.arange(puzzle.size, dtype=np.int16)
+        self.cell_rows, self.cell_cols = np.divmod(cells, puzzle.cols)
+        goal_positions = np.array(puzzle.goal_positions, dtype=np.int16)
+        self.goal_rows, self.goal_cols = np.divmod(goal_positions, puzzle.cols)
+        self.goal_board = unpack_states([puzzle.goal_packed], self.size, self.bits)[0]
+
+    def unpack(self, states):
+        """
+            Packed states of this puzzle as a (k, size) uint8 array
+        """
+        return unpack_states(states, self.size, self.bits)
+
+    def manhattan(self, boards):
+        """
+            Manhattan Distance of every row of a (k, size) array of boards
+        """
+        distance = np.abs(self.goal_rows[boards] - self.cell_rows) + np.abs(
+            self.goal_cols[boards] - self.cell_cols
+        )
+        # The blank does not count
+        distance[boards == 0] = 0
+        return distance.sum(axis=1)
+
+    def misplaced(self, boards):
+        """
+            Misplaced Tile count of every row of a (k, size) array of boards
+        """
+        return ((boards != self.goal_board) & (boards != 0)).sum(axis=1)
+
+    def score(self, states, name="manhattan"):
+        """
+            Heuristic values of a sequence of packed states, as an int array
+            name is "manhattan" or "misplaced"
+        """
+        heuristics = {"manhattan": self.manhattan, "misplaced": self.misplaced}
+        return heuristics[name](self.unpack(states))
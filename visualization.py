@@ -1,11 +1,29 @@
 """
     Purpose: Implement the matplotlib data visualization graphs
+
+    Every plot is saved to output_dir and shown in a window unless show is False.
+    For headless runs select the Agg backend before importing this module, as
+    benchmark_suite.py does.
 """
 
+import os
+
 import matplotlib.pyplot as plt
 
 
-def plot_metrics(data, algo):
+def finish_plot(filename, output_dir=".", show=True):
+    """ 
+        Save the current figure to output_dir, then show it or close it
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    plt.savefig(os.path.join(output_dir, filename))
+    if show:
+        plt.show()
+    else:
+        plt.close()
+
+
+def plot_metrics(data, algo, output_dir=".", show=True):
     """ 
         Plot the 3 metrics, expanded nodes, max queue size, and solution depth for each algorithm
     """
@@ -36,11 +54,10 @@ def plot_metrics(data, algo):
     plt.xticks(rotation=45)
     plt.tight_layout()
 
-    plt.savefig(f"{algo}_metrics.png")
-    plt.show()
+    finish_plot(f"{algo}_metrics.png", output_dir, show)
 
 
-def plot_time_vs_depth(results):
+def plot_time_vs_depth(results, output_dir=".", show=True):
     """ 
         Plot the time vs. solution depth for each algorithm
     """
@@ -56,11 +73,10 @@ def plot_time_vs_depth(results):
     plt.title("Time vs. Solution Depth by Algorithm")
     plt.legend()
     plt.grid(True)
-    plt.savefig("time_vs_depth.png")
-    plt.show()
+    finish_plot("time_vs_depth.png", output_dir, show)
 
 
-def plot_nodes_vs_depth(results):
+def plot_nodes_vs_depth(results, output_dir=".", show=True):
     """ 
         Plot the nodes expanded vs. solution depth for each algorithm
     """
@@ -76,11 +92,10 @@ def plot_nodes_vs_depth(results):
     plt.title("Nodes Expanded vs. Solution Depth by Algorithm")
     plt.legend()
     plt.grid(True)
-    plt.savefig("nodes_vs_depth.png")
-    plt.show()
+    finish_plot("nodes_vs_depth.png", output_dir, show)
 
 
-def plot_max_queue_vs_depth(results):
+def plot_max_queue_vs_depth(results, output_dir=".", show=True):
     """ 
         Plot the max queue size vs. solution depth for each algorithm
     """
@@ -96,5 +111,4 @@ def plot_max_queue_vs_depth(results):
     plt.title("Max Queue Size (# of nodes) vs. Solution Depth by Algorithm")
     plt.legend()
     plt.grid(True)
-    plt.savefig("max_queue_size_vs_depth.png")
-    plt.show()
+    finish_plot("max_queue_size_vs_depth.png", output_dir, show)
@@ -0,0 +1,192 @@
+"""
+    Purpose: Walking distance heuristic -> breadth-first tables over tile counts,
+    full lookup and per-move delta
+
+    Looking only at rows, a board is described by how many tiles of each goal row
+    sit in each row. An up or down move carries one tile into the blank's row, so a
+    breadth-first search from the goal over these count tables gives the fewest
+    vertical moves any board with those counts needs. The same is done for columns
+    and sideways moves, and the two add up to an admissible heuristic that also sees
+    tiles blocking each other, which Manhattan Distance does not.
+
+    Counts are packed into a code with one digit per (line, goal line) pair. The
+    tables only depend on the board size and which line each tile belongs in, so
+    they are built once per process. Only boards up to MAX_LINE x MAX_LINE get
+    tables; larger boards raise ValueError.
+
+    A move changes one tile's weight in each code, so a child's codes come from its
+    parent's in O(1). The codes of scored states are kept until the state is
+    expanded, so the delta never has to rescan the board.
+"""
+
+from collections import deque
+
+from state import get_tile, slide
+
+# Longest line the tables are built for, the 5x5 tables take minutes to search
+MAX_LINE = 4
+# Codes kept for scored states, the oldest are dropped all at once past this
+MAX_CODES = 2**16
+
+# Built tables, keyed by (lines, line length, goal line of every tile)
+_built = {}
+
+
+def build_table(lines, length, goal_counts):
+    """
+        Breadth-first search from the goal over count tables
+        goal_counts[line][goal_line] is how many tiles of goal_line sit in line at the
+        goal, the line holding the blank has one tile fewer
+        Returns {code: fewest moves along this axis}
+    """
+    base = length + 1
+    start = tuple(tuple(row) for row in goal_counts)
+    table = {encode(start, base): 0}
+    frontier = deque([start])
+
+    while frontier:
+        counts = frontier.popleft()
+        d = table[encode(counts, base)]
+        blank = next(line for line in range(lines) if sum(counts[line]) < length)
+        for line in (blank - 1, blank + 1):
+            if not 0 <= line < lines:
+                continue
+            # Move one tile of each goal line from the neighboring line into the blank
+            for goal_line in range(lines):
+                if counts[line][goal_line] == 0:
+                    continue
+                moved = [list(row) for row in counts]
+                moved[line][goal_line] -= 1
+                moved[blank][goal_line] += 1
+                moved = tuple(tuple(row) for row in moved)
+                code = encode(moved, base)
+                if code not in table:
+                    table[code] = d + 1
+                    frontier.append(moved)
+    return table
+
+
+def encode(counts, base):
+    """
+        Code of a count table, one digit per (line, goal line) pair
+    """
+    code = 0
+    for row in reversed(counts):
+        for count in reversed(row):
+            code = code * base + count
+    return code
+
+
+def load_table(lines, length, goal_lines):
+    """
+        Table for one axis, built on first use
+        goal_lines[tile] is the line tile belongs in, the blank's included
+    """
+    key = (lines, length, tuple(goal_lines))
+    if key not in _built:
+        goal_counts = [[0] * lines for _ in range(lines)]
+        for tile in range(1, len(goal_lines)):
+            goal_counts[goal_lines[tile]][goal_lines[tile]] += 1
+        _built[key] = build_table(lines, length, goal_counts)
+    return _built[key]
+
+
+class WalkingDistance:
+    def __init__(self, puzzle):
+        """
+            Build or reuse the row and column tables for the puzzle's goal
+            weights[tile][index] is what tile adds to an axis code from board index
+        """
+        if puzzle.rows > MAX_LINE or puzzle.cols > MAX_LINE:
+            raise ValueError(
+                f"Walking distance tables are only built for up to {MAX_LINE}x"
+                f"{MAX_LINE} boards."
+            )
+        self.size = puzzle.size
+        self.bits = puzzle.bits
+        self.cols = puzzle.cols
+        rows, cols = puzzle.rows, puzzle.cols
+
+        goal_rows = [index // cols for index in puzzle.goal_positions]
+        goal_cols = [index % cols for index in puzzle.goal_positions]
+        self.row_table = load_table(rows, cols, goal_rows)
+        self.col_table = load_table(cols, rows, goal_cols)
+
+        self.row_weights = [[0] * self.size for _ in range(self.size)]
+        self.col_weights = [[0] * self.size for _ in range(self.size)]
+        for tile in range(1, self.size):
+            for index in range(self.size):
+                row, col = divmod(index, cols)
+                self.row_weights[tile][index] = (cols + 1) ** (
+                    row * rows + goal_rows[tile]
+                )
+                self.col_weights[tile][index] = (rows + 1) ** (
+                    col * cols + goal_cols[tile]
+                )
+
+        # (row code, column code) of scored states that may still be expanded,
+        # and of the state whose children are being scored
+        self.known = {}
+        self.parent = None
+        self.parent_codes = None
+
+    def axis_code(self, state, weights):
+        """
+            Code of a packed state along one axis, weights is row_weights or
+            col_weights
+        """
+        code = 0
+        for index in range(self.size):
+            code += weights[get_tile(state, index, self.bits)][index]
+        return code
+
+    def remember(self, state, codes):
+        """
+            Keep the codes of a scored state for when its children are scored
+        """
+        if len(self.known) >= MAX_CODES:
+            self.known.clear()
+        self.known[state] = codes
+
+    def codes_of(self, state):
+        """
+            (row code, column code) of a state whose children are being scored
+            Every child of a state is scored before the next state's, so the codes
+            are looked up, or rebuilt in O(n) if dropped, once per expansion
+        """
+        if state != self.parent:
+            codes = self.known.pop(state, None)
+            if codes is None:
+                codes = (
+                    self.axis_code(state, self.row_weights),
+                    self.axis_code(state, self.col_weights),
+                )
+            self.parent, self.parent_codes = state, codes
+        return self.parent_codes
+
+    def lookup(self, state):
+        """
+            Vertical plus horizontal walking distance of the state
+        """
+        row_code = self.axis_code(state, self.row_weights)
+        col_code = self.axis_code(state, self.col_weights)
+        self.remember(state, (row_code, col_code))
+        return self.row_table[row_code] + self.col_table[col_code]
+
+    def delta(self, state, tile, src, dst):
+        """
+            Change in h after tile slides from src to dst
+            The child's codes differ from its parent's by the one tile's weights,
+            which do not change along the axis the tile did not move on
+        """
+        row_before, col_before = self.codes_of(slide(state, src, dst, self.bits))
+        row_weights, col_weights = self.row_weights[tile], self.col_weights[tile]
+        row_after = row_before - row_weights[src] + row_weights[dst]
+        col_after = col_before - col_weights[src] + col_weights[dst]
+        self.remember(state, (row_after, col_after))
+        return (
+            self.row_table[row_after]
+            - self.row_table[row_before]
+            + self.col_table[col_after]
+            - self.col_table[col_before]
+        )